@@ -1,7 +1,15 @@
+__version__ = 1.0
+
 from .client import Client
+from .cluster import Cluster, ClusterConnection
+from .codec import JSONCodec, get_codec
 from .events import EventListener
+from .file import File
+from .flags import CacheFlags
 from .guild import Guild
+from .member import Member
 from .message import Message
+from .shard import AutoShardedClient
+from .user import User
 from .enums import *
-
-__version__ = 1.0
\ No newline at end of file
+from .errors import *
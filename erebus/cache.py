@@ -0,0 +1,188 @@
+from asyncio import Future, ensure_future, shield
+from collections import OrderedDict
+from functools import partial
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from .codec import JSONCodec, get_codec
+
+class MessageCache:
+    def __init__(
+        self,
+        max_size: Optional[int] = 1000,
+        *,
+        ttl: Optional[float] = None,
+        max_per_channel: Optional[int] = None
+    ) -> None:
+        self.max_size = max_size or 0
+        self.ttl = ttl
+        self.max_per_channel = max_per_channel
+        self._messages: 'OrderedDict[Any, Tuple[Any, float]]' = OrderedDict()
+        self._channels: Dict[Any, Dict[Any, None]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __contains__(self, message_id: Any) -> bool:
+        return self.get(message_id, count=False) is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return (message for message, _ in tuple(self._messages.values()))
+
+    def add(self, message: Any) -> None:
+        if not self.enabled:
+            return
+
+        now = monotonic()
+        expires_at = now + self.ttl if self.ttl is not None else float('inf')
+
+        if self.ttl is not None:
+            # Least recently used messages sit at the front, so they are the first worth checking for expiry.
+            while self._messages:
+                message_id, (_, head_expires_at) = next(iter(self._messages.items()))
+                if head_expires_at > now:
+                    break
+                self._evict(message_id)
+
+        if message.id in self._messages:
+            self._remove(message.id)
+
+        self._messages[message.id] = (message, expires_at)
+        channel = self._channels.setdefault(message.channel_id, {})
+        channel[message.id] = None
+
+        if self.max_per_channel is not None and len(channel) > self.max_per_channel:
+            self._evict(next(iter(channel)))
+
+        while len(self._messages) > self.max_size:
+            self._evict(next(iter(self._messages)))
+
+    def get(self, message_id: Any, *, count: bool = True) -> Optional[Any]:
+        try:
+            message, expires_at = self._messages[message_id]
+        except KeyError:
+            if count:
+                self.misses += 1
+            return None
+
+        if expires_at <= monotonic():
+            self._evict(message_id)
+            if count:
+                self.misses += 1
+            return None
+
+        self._messages.move_to_end(message_id)
+        if count:
+            self.hits += 1
+        return message
+
+    def pop(self, message_id: Any) -> Optional[Any]:
+        message = self.get(message_id)
+        if message is not None:
+            self._remove(message_id)
+        return message
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._channels.clear()
+
+    def expire(self) -> None:
+        now = monotonic()
+        for message_id, (_, expires_at) in tuple(self._messages.items()):
+            if expires_at <= now:
+                self._evict(message_id)
+
+    def _evict(self, message_id: Any) -> None:
+        self._remove(message_id)
+        self.evictions += 1
+
+    def _remove(self, message_id: Any) -> None:
+        message, _ = self._messages.pop(message_id)
+        channel = self._channels.get(message.channel_id)
+        if channel is not None:
+            channel.pop(message_id, None)
+            if not channel:
+                del self._channels[message.channel_id]
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_size: Optional[int] = 1000,
+        *,
+        ttl: Optional[float] = 60,
+        codec: Optional[JSONCodec] = None
+    ) -> None:
+        self.max_size = max_size or 0
+        self.ttl = ttl
+        self.codec = codec or get_codec()
+        # Responses are kept encoded and decoded per caller, so mutating one can't leak into the cache or other callers.
+        self._entries: 'OrderedDict[Hashable, Tuple[str, float]]' = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fetch()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self.codec.loads(entry[0])
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._inflight[key] = ensure_future(self._fetch(fetch))
+            task.add_done_callback(partial(self._fetched, key))
+
+        # Shielded so one caller giving up doesn't cancel the request for everyone else waiting on it.
+        return self.codec.loads(await shield(task))
+
+    async def _fetch(self, fetch: Callable[[], Awaitable[Any]]) -> str:
+        return self.codec.dumps(await fetch())
+
+    def _fetched(self, key: Hashable, task: Future) -> None:
+        # An invalidation while the request was in flight means the response may already be stale.
+        if self._inflight.get(key) is not task:
+            return
+
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        expires_at = monotonic() + self.ttl if self.ttl is not None else float('inf')
+        self._entries[key] = (task.result(), expires_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
@@ -1,2 +1,24 @@
 class GuildChannel:
-    __slots__ = ('id', 'type', 'guild', 'position', 'permission_overwrites', 'name', 'topic', 'is_nsfw')
\ No newline at end of file
+    __slots__ = ('id', 'type', 'guild', 'position', 'permission_overwrites', 'name', 'topic', 'is_nsfw',
+                'parent', 'last_message')
+
+    def __new__(cls):
+        raise Exception('Channels should not be created manually.')
+
+    @classmethod
+    def _create_channel(cls, data: dict, guild):
+        channel = object.__new__(cls)
+        channel.id = data.get('id')
+        channel.guild = guild
+        channel._update(data)
+        return channel
+
+    def _update(self, data: dict) -> None:
+        self.type = data.get('type')
+        self.position = data.get('position')
+        self.permission_overwrites = data.get('permission_overwrites')
+        self.name = data.get('name')
+        self.topic = data.get('topic')
+        self.is_nsfw = data.get('nsfw', False)
+        self.parent = data.get('parent_id')
+        self.last_message = data.get('last_message_id')
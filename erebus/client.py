@@ -1,13 +1,34 @@
-from asyncio import AbstractEventLoop, get_event_loop
+from aiohttp import ClientError, WebSocketError
+from asyncio import (AbstractEventLoop, Event, Future, Semaphore, Task, TimeoutError, gather, get_event_loop, sleep,
+                     wait_for)
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from time import monotonic
 from traceback import print_exception
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
+from .cache import MessageCache
+from .codec import JSONCodec, get_codec
+from .errors import ConnectionClosed, NotFound, RateLimited, ServerError
 from .events import EventListener, maybe_await
-from .flags import Intents
-from .gateway import GatewayWebSocket
-from .guild import Guild
+from .channel import GuildChannel
+from .flags import CacheFlags, Intents
+from .gateway import FATAL_CLOSE_CODES, GatewayWebSocket
+from .guild import ChunkRequest, Guild
+from .iterators import paginate, to_snowflake
+from .member import Member
 from .message import Message
+from .outbox import Outbox
 from .rest import Rest
+from .user import User
+from .utils import ExponentialBackoff, Snowflake, datetime_to_snowflake
+
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+BULK_DELETE_LIMIT = 100
+
+def _bulk_delete_cutoff() -> int:
+    # Leave a minute of slack so ids on the edge don't age out before the request lands.
+    return datetime_to_snowflake(datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE + timedelta(minutes=1))
 
 class Client:
     def __init__(
@@ -16,19 +37,83 @@ class Client:
         loop: Optional[AbstractEventLoop] = None,
         token: Optional[str] = None,
         is_bot: Optional[bool] = None,
-        intents: Optional[Intents] = None
+        intents: Optional[Intents] = None,
+        cache_flags: Optional[CacheFlags] = None,
+        large_threshold: int = 250,
+        chunk_guilds_at_startup: bool = False,
+        guild_ready_timeout: float = 2,
+        compress: bool = False,
+        encoding: str = 'json',
+        json_codec: Optional[JSONCodec] = None,
+        global_rate_limit: float = 50,
+        max_concurrent_requests: Optional[int] = None,
+        max_cached_responses: Optional[int] = 1000,
+        response_cache_ttl: Optional[float] = 60,
+        connector_limit: int = 100,
+        connector_limit_per_host: int = 0,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: Optional[int] = 300,
+        connect_timeout: Optional[float] = 10,
+        read_timeout: Optional[float] = 30,
+        request_timeout: Optional[float] = None,
+        max_concurrent_listeners: Optional[int] = None,
+        max_listener_backlog: Optional[int] = None,
+        max_messages: Optional[int] = 1000,
+        message_ttl: Optional[float] = None,
+        max_messages_per_channel: Optional[int] = None,
+        send_queue_window: float = 0.25
     ):
         self.token = token
+        self.json = json_codec or get_codec()
         self.loop = loop or get_event_loop()
-        self.ws = GatewayWebSocket(self)
-        self.rest = Rest(self)
+        self.ws = GatewayWebSocket(self, compress=compress, encoding=encoding)
+        self.rest = Rest(
+            self,
+            global_rate_limit=global_rate_limit,
+            max_concurrent_requests=max_concurrent_requests,
+            max_cached_responses=max_cached_responses,
+            response_cache_ttl=response_cache_ttl,
+            connector_limit=connector_limit,
+            connector_limit_per_host=connector_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            request_timeout=request_timeout
+        )
         self.is_bot = is_bot
         self.logged_in = False
-        self._listeners = []
+        self.closed = False
+        # Listeners are kept in insertion-ordered dicts so lookup, add and remove are all O(1).
+        self._listeners: Dict[str, Dict[EventListener, None]] = {}
+        self._listener_tasks: Set[Task] = set()
+        self._waiters: Dict[str, Dict[Future, Optional[Callable[..., bool]]]] = {}
+        self._listener_semaphore = Semaphore(max_concurrent_listeners) if max_concurrent_listeners else None
+        self._listener_backlog = Semaphore(max_listener_backlog) if max_listener_backlog else None
+        self.listener_tasks_running = 0
         self.intents = intents or Intents.without_privileged()
+        self.cache_flags = cache_flags or CacheFlags.from_intents(self.intents)
         self.guilds = {}
         self.channels = {}
-        self.messages = {}
+        self.users = {}
+        self.large_threshold = large_threshold
+        self.chunk_guilds_at_startup = chunk_guilds_at_startup
+        self.guild_ready_timeout = guild_ready_timeout
+        self.user = None
+        self.startup_metrics: Dict[Optional[int], Dict[str, Any]] = {}
+        self._pending_guilds: Dict[Optional[int], Set[Any]] = {}
+        self._guild_streamed: Dict[Optional[int], Event] = {}
+        self._stream_tasks: Dict[Optional[int], Task] = {}
+        self._connect_started = None
+        self._chunk_requests: Dict[str, ChunkRequest] = {}
+        self._chunk_queue: List[Any] = []
+        self._chunk_task: Optional[Task] = None
+
+        if not self.cache_flags.messages:
+            max_messages = None
+        self.messages = MessageCache(max_messages, ttl=message_ttl, max_per_channel=max_messages_per_channel)
+        self.outbox = Outbox(self, window=send_queue_window)
+        self.shard_count = None
     
     async def login(self, token: Optional[str] = None) -> None:
         if token is None:
@@ -43,37 +128,244 @@ class Client:
     async def connect(self):
         if not self.logged_in:
             raise Exception("Cannot connect to websocket without logging in.")
-        socket = await self.rest.ws_connect()
+        self._connect_started = monotonic()
         try:
-            await self.ws.connect(socket)
+            await self._run_gateway(self.ws)
         except KeyboardInterrupt:
             pass
-        finally:
-            await self.rest._session.close()
+
+    async def _run_gateway(self, ws: GatewayWebSocket, url: Optional[str] = None) -> None:
+        backoff = ExponentialBackoff()
+
+        while not self.closed:
+            try:
+                socket = await self.rest.ws_connect(url, compress=ws.compress, encoding=ws.encoding)
+            except (OSError, ClientError, TimeoutError, ServerError):
+                await sleep(backoff.delay())
+                continue
+            except RateLimited as error:
+                await sleep(max(error.retry_after, backoff.delay()))
+                continue
+
+            try:
+                await ws.connect(socket)
+            except (OSError, ClientError, WebSocketError, TimeoutError):
+                # The socket died under us, the session is still valid so the next connection resumes it.
+                pass
+            finally:
+                # Anything but 1000 or 1001 keeps the session alive for the resume.
+                if not socket.closed and not self.closed:
+                    await socket.close(code=4000)
+
+            if self.closed:
+                return
+
+            if ws.close_code in FATAL_CLOSE_CODES:
+                raise ConnectionClosed(ws.close_code, ws.shard_id)
+
+            # Only keep backing off while connections fail before READY or RESUMED.
+            if ws.established:
+                backoff.reset()
+            await sleep(backoff.delay())
+
+    async def close(self) -> None:
+        self.closed = True
+        self.outbox.close()
+        if self.ws.socket is not None:
+            await self.ws.close()
+        await self.rest.close()
     
     async def start(self, *args, **kwargs):
         await self.login(*args, **kwargs)
-        await self.connect()
+        try:
+            await self.connect()
+        finally:
+            await self.rest.close()
     
     def run(self, *args, **kwargs):
         self.loop.run_until_complete(self.start(*args, **kwargs))
         self.loop.close()
     
+    @property
+    def latency(self) -> float:
+        return self.ws.latency
+
+    def get_shard_id(self, guild_id: int) -> int:
+        if self.shard_count is None:
+            return 0
+        return (int(guild_id) >> 22) % self.shard_count
+
+    async def _before_identify(self, shard_id: Optional[int]) -> None:
+        pass
+
+    async def _shard_ready(self, shard_id: Optional[int], data: dict) -> None:
+        # A fresh session means any updates sent while we were gone are lost, so cached responses can't be trusted.
+        self.rest.cache.clear()
+
+        # A new READY restarts the stream, the old one's pending guilds are already stale.
+        previous = self._stream_tasks.pop(shard_id, None)
+        if previous is not None:
+            previous.cancel()
+
+        self.user = self._store_user(data['user'])
+        self._pending_guilds[shard_id] = {guild['id'] for guild in data.get('guilds', ())}
+        self._guild_streamed[shard_id] = Event()
+        self.startup_metrics[shard_id] = {
+            'connect_time': monotonic() - self._connect_started if self._connect_started is not None else None,
+            'guilds_expected': len(self._pending_guilds[shard_id])
+        }
+
+        await self.dispatch_event('connect')
+        self._stream_tasks[shard_id] = self.loop.create_task(self._stream_guilds(shard_id))
+
+    async def _stream_guilds(self, shard_id: Optional[int]) -> None:
+        # READY only lists guild ids, hold off on ready until their GUILD_CREATEs arrive or they stop coming.
+        started = monotonic()
+        pending = self._pending_guilds[shard_id]
+        streamed = self._guild_streamed[shard_id]
+
+        while pending:
+            try:
+                await wait_for(streamed.wait(), self.guild_ready_timeout)
+            except TimeoutError:
+                break
+            streamed.clear()
+
+        metrics = self.startup_metrics[shard_id]
+        metrics['stream_time'] = monotonic() - started
+        metrics['guilds_missing'] = len(pending)
+        if metrics['connect_time'] is not None:
+            metrics['ready_time'] = monotonic() - self._connect_started
+
+        self._pending_guilds.pop(shard_id, None)
+        self._guild_streamed.pop(shard_id, None)
+        await self._shard_streamed(shard_id)
+        self._stream_tasks.pop(shard_id, None)
+
+    async def _shard_streamed(self, shard_id: Optional[int]) -> None:
+        await self.dispatch_event('ready')
+
+    def _mark_guild_streamed(self, guild_id: Any) -> None:
+        shard_id = self.get_shard_id(guild_id) if self.shard_count is not None else None
+        pending = self._pending_guilds.get(shard_id)
+
+        if pending is not None and guild_id in pending:
+            pending.discard(guild_id)
+            self._guild_streamed[shard_id].set()
+
+    @property
+    def listener_queue_depth(self) -> int:
+        return len(self._listener_tasks) - self.listener_tasks_running
+
     async def dispatch_event(self, event_name: str, *args, **kwargs):
-        for listener in filter(lambda l: l.event_name == event_name, self._listeners):
-            await listener(*args, **kwargs)
+        waiters = self._waiters.get(event_name)
+        if waiters:
+            self._resolve_waiters(waiters, args)
+
+        listeners = self._listeners.get(event_name)
+        if listeners:
+            for listener in tuple(listeners):
+                await self._schedule_listener(event_name, listener, args, kwargs)
 
         listener = getattr(self, 'on_' + event_name, None)
         if listener is not None:
-            await maybe_await(listener, *args, **kwargs)
+            await self._schedule_listener(event_name, partial(maybe_await, listener), args, kwargs)
+
+    def _resolve_waiters(self, waiters: Dict[Future, Optional[Callable[..., bool]]], args: Tuple[Any, ...]) -> None:
+        for future, check in tuple(waiters.items()):
+            if future.done():
+                del waiters[future]
+                continue
+
+            try:
+                if check is not None and not check(*args):
+                    continue
+            except Exception as error:
+                future.set_exception(error)
+            else:
+                future.set_result(args[0] if len(args) == 1 else args or None)
+
+            del waiters[future]
+
+    async def wait_for(
+        self,
+        event_name: str,
+        *,
+        check: Optional[Callable[..., bool]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        future = self.loop.create_future()
+        waiters = self._waiters.setdefault(event_name, {})
+        waiters[future] = check
+
+        try:
+            return await wait_for(future, timeout)
+        finally:
+            waiters.pop(future, None)
+            if not waiters and self._waiters.get(event_name) is waiters:
+                del self._waiters[event_name]
+
+    async def _schedule_listener(
+        self,
+        event_name: str,
+        callback: Callable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any]
+    ) -> None:
+        # Listeners run as their own tasks so a slow one can't stall the gateway read loop.
+        # Once the backlog is full, dispatching waits for room instead of piling up tasks forever.
+        # Errors are dispatched by listeners that already hold a slot, so waiting on a full backlog would deadlock.
+        backlog = self._listener_backlog if event_name != 'error' else None
+        if backlog is not None:
+            await backlog.acquire()
+
+        task = self.loop.create_task(self._run_listener(event_name, callback, args, kwargs))
+        self._listener_tasks.add(task)
+        task.add_done_callback(self._listener_done if backlog is not None else self._listener_tasks.discard)
+
+    async def _run_listener(
+        self,
+        event_name: str,
+        callback: Callable,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any]
+    ) -> None:
+        if self._listener_semaphore is not None:
+            await self._listener_semaphore.acquire()
+
+        self.listener_tasks_running += 1
+        try:
+            await callback(*args, **kwargs)
+        except Exception as error:
+            if event_name == 'error':
+                print_exception(type(error), error, error.__traceback__)
+            else:
+                await self.dispatch_event('error', error)
+        finally:
+            self.listener_tasks_running -= 1
+            if self._listener_semaphore is not None:
+                self._listener_semaphore.release()
+
+    def _listener_done(self, task: Task) -> None:
+        self._listener_tasks.discard(task)
+        if self._listener_backlog is not None:
+            self._listener_backlog.release()
 
     def add_listener(self, listener: EventListener):
-        self._listeners.append(listener)
+        self._listeners.setdefault(listener.event_name, {})[listener] = None
+
+    def remove_listener(self, listener: EventListener):
+        listeners = self._listeners.get(listener.event_name)
+        if listeners is not None:
+            listeners.pop(listener, None)
+            if not listeners:
+                del self._listeners[listener.event_name]
     
     def listener(self, *args, **kwargs):
         if len(args) == 1 and not kwargs and callable(args[0]):
             func = args[0]
-            listener = EventListener(func, func.__name__)
+            name = func.__name__[3:] if func.__name__.startswith('on_') else func.__name__
+            listener = EventListener(func, event_name=name)
             self.add_listener(listener)
             return listener
 
@@ -99,11 +391,371 @@ class Client:
         msg = Message._create_message(self, data)
         await self.dispatch_event(event_name, msg)
 
+    def get_message(self, message_id) -> Optional[Message]:
+        return self.messages.get(message_id)
+
+    async def channel_history(
+        self,
+        channel_id: Snowflake,
+        *,
+        limit: Optional[int] = None,
+        before: Union[Snowflake, datetime, None] = None,
+        after: Union[Snowflake, datetime, None] = None
+    ) -> AsyncIterator[Message]:
+        before = to_snowflake(before)
+        after = to_snowflake(after, high=True)
+
+        if after is not None:
+            # Discord can't bound both ends at once, so walk forwards from after and cut the pages off at before.
+            async def fetch(amount: int, cursor: Optional[Snowflake]) -> List[dict]:
+                page = await self.rest.get_messages(channel_id, after=cursor, limit=amount)
+                page.reverse()
+                if before is not None:
+                    page = [data for data in page if int(data['id']) < before]
+                return page
+
+            cursor = after
+        else:
+            async def fetch(amount: int, cursor: Optional[Snowflake]) -> List[dict]:
+                return await self.rest.get_messages(channel_id, before=cursor, limit=amount)
+
+            cursor = before
+
+        # History would churn the live message cache, so these messages are never added to it.
+        async for data in paginate(fetch, cursor, limit=limit):
+            yield Message._create_message(self, data, cache=False)
+
+    async def reaction_users(
+        self,
+        channel_id: Snowflake,
+        message_id: Snowflake,
+        emoji: str,
+        *,
+        limit: Optional[int] = None,
+        after: Optional[Snowflake] = None
+    ) -> AsyncIterator[User]:
+        async def fetch(amount: int, cursor: Optional[Snowflake]) -> List[dict]:
+            return await self.rest.get_reactions(channel_id, message_id, emoji, after=cursor, limit=amount)
+
+        async for data in paginate(fetch, to_snowflake(after), limit=limit):
+            yield self._store_user(data)
+
+    async def audit_logs(
+        self,
+        guild_id: Snowflake,
+        *,
+        limit: Optional[int] = None,
+        before: Union[Snowflake, datetime, None] = None,
+        user_id: Optional[Snowflake] = None,
+        action_type: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        async def fetch(amount: int, cursor: Optional[Snowflake]) -> List[dict]:
+            data = await self.rest.get_audit_logs(
+                guild_id,
+                user_id=user_id,
+                action_type=action_type,
+                before=cursor,
+                limit=amount
+            )
+            for user in data.get('users', ()):
+                self._store_user(user)
+            return data['audit_log_entries']
+
+        async for entry in paginate(fetch, to_snowflake(before), limit=limit):
+            yield entry
+
+    async def send_message(self, channel_id: Snowflake, content: Optional[str] = None, **kwargs) -> Message:
+        data = await self.rest.create_message(channel_id, content, **kwargs)
+        return Message._create_message(self, data)
+
+    def queue_message(self, channel_id: Snowflake, content: Optional[str] = None, **kwargs) -> 'Future[Message]':
+        # Sends queued for the same channel within send_queue_window are merged into as few messages as possible.
+        return self.outbox.put(channel_id, content, **kwargs)
+
+    async def delete_messages(
+        self,
+        channel_id: Snowflake,
+        message_ids: Iterable[Snowflake],
+        *,
+        max_concurrency: int = 5,
+        progress: Optional[Callable[[int, int], Any]] = None
+    ) -> int:
+        # Bulk delete only takes 2-100 ids younger than two weeks, everything else has to go one at a time.
+        cutoff = _bulk_delete_cutoff()
+        young, old = [], []
+        for message_id in message_ids:
+            (young if int(message_id) > cutoff else old).append(message_id)
+
+        total = len(young) + len(old)
+        deleted = 0
+
+        async def report(count: int) -> None:
+            nonlocal deleted
+            deleted += count
+            if progress is not None:
+                await maybe_await(progress, deleted, total)
+
+        for start in range(0, len(young), BULK_DELETE_LIMIT):
+            batch = young[start:start + BULK_DELETE_LIMIT]
+            if len(batch) == 1:
+                old.extend(batch)
+                continue
+
+            await self.rest.bulk_delete_messages(channel_id, batch)
+            await report(len(batch))
+
+        semaphore = Semaphore(max_concurrency)
+
+        async def delete(message_id: Snowflake) -> None:
+            async with semaphore:
+                try:
+                    await self.rest.delete_message(channel_id, message_id)
+                except NotFound:
+                    # Already gone, which is all the caller wanted.
+                    pass
+            await report(1)
+
+        await gather(*map(delete, old))
+        return deleted
+
+    async def purge(
+        self,
+        channel_id: Snowflake,
+        *,
+        limit: Optional[int] = 100,
+        check: Optional[Callable[[Message], Any]] = None,
+        before: Union[Snowflake, datetime, None] = None,
+        after: Union[Snowflake, datetime, None] = None,
+        progress: Optional[Callable[[int, int], Any]] = None
+    ) -> List[Message]:
+        deleted: List[Message] = []
+        batch: List[Message] = []
+
+        async def flush() -> None:
+            offset = len(deleted)
+
+            def report(count: int, total: int) -> Any:
+                if progress is not None:
+                    return progress(offset + count, offset + total)
+
+            await self.delete_messages(channel_id, [message.id for message in batch], progress=report)
+            deleted.extend(batch)
+            batch.clear()
+
+        # Delete in batches while the history is still streaming instead of collecting the whole channel first.
+        async for message in self.channel_history(channel_id, limit=limit, before=before, after=after):
+            if check is not None and not await maybe_await(check, message):
+                continue
+
+            batch.append(message)
+            if len(batch) == BULK_DELETE_LIMIT:
+                await flush()
+
+        if batch:
+            await flush()
+
+        return deleted
+
+    async def _handle_message_update(self, event_name: str, data: dict):
+        await self.dispatch_event('raw_message_update', data)
+
+        message = self.messages.get(data['id'])
+        if message is not None:
+            await self.dispatch_event(event_name, message, data)
+
+    async def _handle_message_delete(self, event_name: str, data: dict):
+        await self.dispatch_event('raw_message_delete', data)
+
+        message = self.messages.pop(data['id'])
+        if message is not None:
+            await self.dispatch_event(event_name, message)
+
+    async def _handle_message_delete_bulk(self, event_name: str, data: dict):
+        await self.dispatch_event('raw_message_delete_bulk', data)
+
+        messages = [message for message in map(self.messages.pop, data['ids']) if message is not None]
+        if messages:
+            await self.dispatch_event(event_name, messages)
+
+    def _store_user(self, data: dict) -> User:
+        # Users are interned so every message and member from the same user shares one object.
+        user = self.users.get(data['id'])
+
+        if user is None:
+            user = User._create_user(data)
+            if self.cache_flags.users:
+                self.users[user.id] = user
+        else:
+            user._update(data)
+
+        return user
+
+    def _get_websocket(self, guild_id: Any) -> GatewayWebSocket:
+        return self.ws
+
+    async def chunk_guilds(
+        self,
+        guilds: Iterable[Union[Guild, int]],
+        *,
+        query: str = '',
+        limit: int = 0,
+        presences: bool = False,
+        timeout: Optional[float] = None
+    ) -> List[Member]:
+        # One REQUEST_GUILD_MEMBERS per shard covers every guild on that shard.
+        by_socket: Dict[GatewayWebSocket, List[Any]] = {}
+        for guild in guilds:
+            guild_id = str(guild.id if isinstance(guild, Guild) else guild)
+            by_socket.setdefault(self._get_websocket(guild_id), []).append(guild_id)
+
+        requests = []
+        for ws, guild_ids in by_socket.items():
+            request = ChunkRequest(guild_ids, self.loop.create_future())
+            self._chunk_requests[request.nonce] = request
+            requests.append(request)
+            await ws.request_guild_members(
+                guild_ids if len(guild_ids) > 1 else guild_ids[0],
+                query=query,
+                limit=limit,
+                presences=presences,
+                nonce=request.nonce
+            )
+
+        try:
+            results = await wait_for(gather(*(request.future for request in requests)), timeout)
+        finally:
+            for request in requests:
+                self._chunk_requests.pop(request.nonce, None)
+
+        return [member for members in results for member in members]
+
+    async def chunk_guild(self, guild: Union[Guild, int], **kwargs) -> List[Member]:
+        return await self.chunk_guilds([guild], **kwargs)
+
+    async def _flush_chunk_queue(self) -> None:
+        # Give the rest of the GUILD_CREATE burst a moment to arrive so it goes out in as few requests as possible.
+        await sleep(1)
+        guilds, self._chunk_queue = self._chunk_queue, []
+        self._chunk_task = None
+
+        try:
+            await self.chunk_guilds(guilds, timeout=60)
+        except Exception as error:
+            await self.dispatch_event('error', error)
+
     async def _handle_guild_create(self, event_name: str, data: dict):
-        guild = Guild._create_guild(data)
+        guild = Guild._create_guild(self, data, self.get_shard_id(data['id']))
         self.guilds[guild.id] = guild
+        self._mark_guild_streamed(guild.id)
+
+        if self.chunk_guilds_at_startup and self.cache_flags.members and self.intents.members and not guild.chunked:
+            self._chunk_queue.append(guild)
+            if self._chunk_task is None:
+                self._chunk_task = self.loop.create_task(self._flush_chunk_queue())
+
         await self.dispatch_event(event_name, guild)
 
+    async def _handle_guild_members_chunk(self, event_name: str, data: dict):
+        guild = self.guilds.get(data['guild_id'])
+        members = []
+
+        if guild is not None and self.cache_flags.members:
+            members = [guild._add_member(self, member) for member in data.get('members', ())]
+
+        request = self._chunk_requests.get(data.get('nonce'))
+        if request is not None:
+            request.add(data, members)
+
+    async def _handle_guild_update(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('guild', str(data['id'])))
+        await self.dispatch_event(event_name, data)
+
+    async def _handle_guild_emojis_update(self, event_name: str, data: dict):
+        guild_id = str(data['guild_id'])
+        self.rest.cache.invalidate(('guild', guild_id), ('emojis', guild_id))
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None and self.cache_flags.emojis:
+            guild.emojis = {emoji['id']: emoji for emoji in data['emojis']}
+        await self.dispatch_event(event_name, data)
+
+    async def _handle_guild_role_create(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('guild', str(data['guild_id'])))
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None and self.cache_flags.roles:
+            role = data['role']
+            guild.roles[role['id']] = role
+        await self.dispatch_event(event_name, data)
+
+    _handle_guild_role_update = _handle_guild_role_create
+
+    async def _handle_guild_role_delete(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('guild', str(data['guild_id'])))
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None:
+            guild.roles.pop(data['role_id'], None)
+        await self.dispatch_event(event_name, data)
+
+    async def _handle_guild_delete(self, event_name: str, data: dict):
+        guild_id = str(data['id'])
+        self.rest.cache.invalidate(('guild', guild_id), ('emojis', guild_id))
+        guild = self.guilds.pop(data['id'], None)
+        if guild is None:
+            return await self.dispatch_event(event_name, data)
+
+        for channel_id in guild.channels:
+            self.channels.pop(channel_id, None)
+        await self.dispatch_event(event_name, guild)
+
+    async def _handle_guild_member_add(self, event_name: str, data: dict):
+        guild = self.guilds.get(data['guild_id'])
+        if guild is None or not self.cache_flags.members:
+            return await self.dispatch_event(event_name, data)
+
+        await self.dispatch_event(event_name, guild._add_member(self, data))
+
+    async def _handle_guild_member_remove(self, event_name: str, data: dict):
+        guild = self.guilds.get(data['guild_id'])
+        member = guild.members.pop(data['user']['id'], None) if guild is not None else None
+        await self.dispatch_event(event_name, member if member is not None else data)
+
+    async def _handle_channel_create(self, event_name: str, data: dict):
+        guild = self.guilds.get(data.get('guild_id'))
+        if guild is None or not self.cache_flags.channels:
+            return await self.dispatch_event(event_name, data)
+
+        channel = GuildChannel._create_channel(data, guild)
+        guild.channels[channel.id] = self.channels[channel.id] = channel
+        await self.dispatch_event(event_name, channel)
+
+    async def _handle_channel_update(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('channel', str(data['id'])))
+        channel = self.channels.get(data['id'])
+        if channel is None:
+            return await self._handle_channel_create(event_name, data)
+
+        channel._update(data)
+        await self.dispatch_event(event_name, channel)
+
+    async def _handle_channel_delete(self, event_name: str, data: dict):
+        channel_id = str(data['id'])
+        self.rest.cache.invalidate(('channel', channel_id), ('pins', channel_id), ('invites', channel_id))
+        channel = self.channels.pop(data['id'], None)
+        if channel is None:
+            return await self.dispatch_event(event_name, data)
+
+        channel.guild.channels.pop(channel.id, None)
+        await self.dispatch_event(event_name, channel)
+
+    async def _handle_channel_pins_update(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('pins', str(data['channel_id'])))
+        await self.dispatch_event(event_name, data)
+
+    async def _handle_invite_create(self, event_name: str, data: dict):
+        self.rest.cache.invalidate(('invites', str(data['channel_id'])))
+        await self.dispatch_event(event_name, data)
+
+    _handle_invite_delete = _handle_invite_create
+
     def on_error(self, error: Exception):
-        if 'error' not in (listener.event_name for listener in self._listeners):
+        if not self._listeners.get('error'):
             print_exception(type(error), error, error.__traceback__)
@@ -0,0 +1,210 @@
+import asyncio
+from itertools import count
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+import os
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from .client import Client
+from .shard import IDENTIFY_INTERVAL, AutoShardedClient
+
+class ClusterConnection:
+    def __init__(self, client: AutoShardedClient, conn: Connection) -> None:
+        self.client = client
+        self.conn = conn
+        self.handlers: Dict[str, Callable[[AutoShardedClient], Any]] = {
+            'guild_count': lambda client: len(client.guilds),
+            'shard_ids': lambda client: list(client.shards),
+        }
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._nonces = count()
+
+    def start(self) -> None:
+        self.client.loop.add_reader(self.conn.fileno(), self._on_readable)
+
+    def stop(self) -> None:
+        self.client.loop.remove_reader(self.conn.fileno())
+
+    def _request(self, op: str, *args) -> asyncio.Future:
+        nonce = next(self._nonces)
+        future = self._futures[nonce] = self.client.loop.create_future()
+        self.conn.send((op, nonce, *args))
+        return future
+
+    def _on_readable(self) -> None:
+        try:
+            while self.conn.poll():
+                op, nonce, *args = self.conn.recv()
+
+                if op == 'query':
+                    self.conn.send(('reply', nonce, self._answer(*args)))
+                else:
+                    future = self._futures.pop(nonce, None)
+                    if future is not None and not future.done():
+                        future.set_result(args[0] if args else None)
+        except EOFError:
+            self.stop()
+
+    def _answer(self, name: str) -> Any:
+        handler = self.handlers.get(name)
+        return handler(self.client) if handler is not None else None
+
+    async def identify(self, shard_id: int) -> None:
+        await self._request('identify', shard_id)
+
+    async def query(self, name: str) -> List[Any]:
+        return await self._request('query', name)
+
+    async def guild_count(self) -> int:
+        return sum(await self.query('guild_count'))
+
+def _run_worker(
+    client_class: Type[AutoShardedClient],
+    token: str,
+    shard_ids: List[int],
+    shard_count: int,
+    client_kwargs: Dict[str, Any],
+    conn: Connection
+) -> None:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    client = client_class(loop=loop, shard_ids=shard_ids, shard_count=shard_count, **client_kwargs)
+    client.cluster = ClusterConnection(client, conn)
+    client.cluster.start()
+    client.run(token)
+
+class Cluster:
+    def __init__(
+        self,
+        *,
+        token: str,
+        workers: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        client_class: Type[AutoShardedClient] = AutoShardedClient,
+        **client_kwargs
+    ) -> None:
+        self.token = token
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_count = shard_count
+        self.max_concurrency = 1
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs
+        self.processes: List[Process] = []
+        self._connections: Dict[Connection, Process] = {}
+        self._queries: Dict[int, Tuple[Connection, int, List[Any], Set[Connection]]] = {}
+        self._query_ids = count()
+        self._last_identify: Dict[int, float] = {}
+        self._identify_queue: List[Tuple[float, Connection, int]] = []
+
+    async def _fetch_gateway(self) -> None:
+        client = Client(token=self.token)
+        await client.login()
+        try:
+            data = await client.rest.get_gateway_bot()
+        finally:
+            await client.rest.close()
+
+        self.max_concurrency = data['session_start_limit']['max_concurrency']
+        if self.shard_count is None:
+            self.shard_count = data['shards']
+
+    def start(self) -> None:
+        asyncio.run(self._fetch_gateway())
+        workers = min(self.workers, self.shard_count)
+
+        for worker in range(workers):
+            parent_conn, child_conn = Pipe()
+            process = Process(
+                target=_run_worker,
+                args=(
+                    self.client_class,
+                    self.token,
+                    list(range(worker, self.shard_count, workers)),
+                    self.shard_count,
+                    self.client_kwargs,
+                    child_conn
+                ),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.processes.append(process)
+            self._connections[parent_conn] = process
+
+    def run(self) -> None:
+        self.start()
+        try:
+            while self._connections:
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def poll(self) -> None:
+        timeout = None
+        if self._identify_queue:
+            timeout = max(0, self._identify_queue[0][0] - monotonic())
+
+        for conn in wait(list(self._connections), timeout):
+            try:
+                message = conn.recv()
+            except EOFError:
+                self._remove_worker(conn)
+                continue
+
+            self._handle(conn, *message)
+
+        now = monotonic()
+        while self._identify_queue and self._identify_queue[0][0] <= now:
+            due, conn, nonce = self._identify_queue.pop(0)
+            if conn in self._connections:
+                conn.send(('identify', nonce))
+
+    def _handle(self, conn: Connection, op: str, nonce: int, *args) -> None:
+        if op == 'identify':
+            # Pacing happens here rather than in the workers, since every process shares the same identify buckets.
+            bucket = args[0] % self.max_concurrency
+            due = max(monotonic(), self._last_identify.get(bucket, -IDENTIFY_INTERVAL) + IDENTIFY_INTERVAL)
+            self._last_identify[bucket] = due
+            self._identify_queue.append((due, conn, nonce))
+            self._identify_queue.sort(key=lambda item: item[0])
+
+        elif op == 'query':
+            query_id = next(self._query_ids)
+            self._queries[query_id] = (conn, nonce, [], set(self._connections))
+            for worker in self._connections:
+                worker.send(('query', query_id, *args))
+
+        elif op == 'reply':
+            _, _, replies, pending = self._queries[nonce]
+            replies.append(args[0])
+            pending.discard(conn)
+            self._finish_query(nonce)
+
+    def _finish_query(self, query_id: int) -> None:
+        origin, nonce, replies, pending = self._queries[query_id]
+        if pending:
+            return
+
+        del self._queries[query_id]
+        if origin in self._connections:
+            origin.send(('result', nonce, replies))
+
+    def _remove_worker(self, conn: Connection) -> None:
+        del self._connections[conn]
+        for query_id, (_, _, _, pending) in tuple(self._queries.items()):
+            pending.discard(conn)
+            self._finish_query(query_id)
+
+    def close(self) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+        for conn in self._connections:
+            conn.close()
+        self._connections.clear()
@@ -0,0 +1,48 @@
+import json
+from functools import partial
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__all__ = ('JSONCodec', 'get_codec')
+
+class JSONCodec:
+    __slots__ = ('name', 'loads', 'dumps')
+
+    def __init__(self, name: str, loads: Callable[[Union[str, bytes]], Any], dumps: Callable[[Any], str]) -> None:
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return f'<JSONCodec name={self.name!r}>'
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+def get_codec(name: Optional[str] = None) -> JSONCodec:
+    if name is None:
+        name = 'orjson' if orjson is not None else 'ujson' if ujson is not None else 'json'
+
+    if name == 'orjson':
+        if orjson is None:
+            raise ValueError("orjson isn't installed.")
+        return JSONCodec('orjson', orjson.loads, _orjson_dumps)
+
+    if name == 'ujson':
+        if ujson is None:
+            raise ValueError("ujson isn't installed.")
+        return JSONCodec('ujson', ujson.loads, partial(ujson.dumps, ensure_ascii=False))
+
+    if name == 'json':
+        return JSONCodec('json', json.loads, partial(json.dumps, separators=(',', ':'), ensure_ascii=False))
+
+    raise ValueError(f'{name!r} is not a supported JSON library.')
@@ -40,3 +40,12 @@ class MessageFlags(IntFlag):
     URGENT = 1 << 4
     EPHEMERAL = 1 << 5
     LOADING = 1 << 6
+
+class CacheFlags(IntFlag):
+    USERS = 1 << 0
+    MEMBERS = 1 << 1
+    CHANNELS = 1 << 2
+    ROLES = 1 << 3
+    EMOJIS = 1 << 4
+    MESSAGES = 1 << 5
+    VOICE_STATES = 1 << 6
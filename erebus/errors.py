@@ -0,0 +1,52 @@
+from typing import Any, Optional
+
+__all__ = (
+    'ErebusException',
+    'ConnectionClosed',
+    'HTTPException',
+    'Forbidden',
+    'NotFound',
+    'RateLimited',
+    'ServerError',
+)
+
+class ErebusException(Exception):
+    pass
+
+class ConnectionClosed(ErebusException):
+    def __init__(self, code: Optional[int], shard_id: Optional[int] = None) -> None:
+        self.code = code
+        self.shard_id = shard_id
+        super().__init__(f'The gateway closed the connection with code {code}.')
+
+class HTTPException(ErebusException):
+    def __init__(self, response, data: Any) -> None:
+        self.response = response
+        self.status = response.status
+        self.data = data
+
+        if isinstance(data, dict):
+            self.code = data.get('code', 0)
+            self.text = data.get('message', '')
+            self.errors = data.get('errors')
+        else:
+            self.code = 0
+            self.text = data or ''
+            self.errors = None
+
+        super().__init__(f'{self.status} {response.reason} (error code: {self.code}): {self.text}')
+
+class Forbidden(HTTPException):
+    pass
+
+class NotFound(HTTPException):
+    pass
+
+class RateLimited(HTTPException):
+    def __init__(self, response, data: Any, retry_after: float, is_global: bool = False) -> None:
+        self.retry_after = retry_after
+        self.is_global = is_global
+        super().__init__(response, data)
+
+class ServerError(HTTPException):
+    pass
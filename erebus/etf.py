@@ -0,0 +1,252 @@
+from struct import Struct, error as StructError
+from typing import Any, Callable, Dict, List, Tuple, Union
+import zlib
+
+__all__ = ('ETFDecodeError', 'decode', 'encode')
+
+FORMAT_VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_uint8 = Struct('>B')
+_uint16 = Struct('>H')
+_uint32 = Struct('>I')
+_int32 = Struct('>i')
+_float64 = Struct('>d')
+_uint8_uint8 = Struct('>BB')
+_uint32_uint8 = Struct('>IB')
+
+_ATOMS = {'nil': None, 'true': True, 'false': False}
+
+class ETFDecodeError(ValueError):
+    pass
+
+class _Decoder:
+    __slots__ = ('view', 'offset', 'bigints_as_str')
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview], bigints_as_str: bool = False) -> None:
+        self.view = memoryview(data)
+        self.offset = 0
+        self.bigints_as_str = bigints_as_str
+
+    def decode(self) -> Any:
+        view = self.view
+        if not view or view[0] != FORMAT_VERSION:
+            raise ETFDecodeError('Missing the ETF version byte.')
+
+        if len(view) > 1 and view[1] == COMPRESSED:
+            size, = _uint32.unpack_from(view, 2)
+            self.view = view = memoryview(zlib.decompress(view[6:], bufsize=size))
+            self.offset = 0
+        else:
+            self.offset = 1
+
+        term = self._decode_term()
+        # Slicing past the end doesn't raise, a truncated string or big integer only shows up in the final offset.
+        if self.offset > len(self.view):
+            raise ETFDecodeError('Truncated ETF payload.')
+        return term
+
+    def _decode_term(self) -> Any:
+        tag = self.view[self.offset]
+        self.offset += 1
+
+        try:
+            handler = _HANDLERS[tag]
+        except KeyError:
+            raise ETFDecodeError(f'Unsupported ETF tag {tag}.') from None
+
+        return handler(self)
+
+    def _decode_new_float(self) -> float:
+        value, = _float64.unpack_from(self.view, self.offset)
+        self.offset += 8
+        return value
+
+    def _decode_small_integer(self) -> int:
+        value = self.view[self.offset]
+        self.offset += 1
+        return value
+
+    def _decode_integer(self) -> int:
+        value, = _int32.unpack_from(self.view, self.offset)
+        self.offset += 4
+        return value
+
+    def _decode_float(self) -> float:
+        start = self.offset
+        self.offset += 31
+        return float(str(self.view[start:self.offset], 'latin-1').rstrip('\x00'))
+
+    def _atom(self, length: int) -> Any:
+        start = self.offset
+        self.offset += length
+        name = str(self.view[start:self.offset], 'utf-8')
+        return _ATOMS.get(name, name)
+
+    def _decode_atom(self) -> Any:
+        length, = _uint16.unpack_from(self.view, self.offset)
+        self.offset += 2
+        return self._atom(length)
+
+    def _decode_small_atom(self) -> Any:
+        length = self.view[self.offset]
+        self.offset += 1
+        return self._atom(length)
+
+    def _decode_small_tuple(self) -> Tuple[Any, ...]:
+        arity = self.view[self.offset]
+        self.offset += 1
+        return tuple([self._decode_term() for _ in range(arity)])
+
+    def _decode_large_tuple(self) -> Tuple[Any, ...]:
+        arity, = _uint32.unpack_from(self.view, self.offset)
+        self.offset += 4
+        return tuple([self._decode_term() for _ in range(arity)])
+
+    def _decode_string(self) -> List[int]:
+        # Despite the name, Erlang uses this tag for short lists of small integers, like READY's shard pair.
+        length, = _uint16.unpack_from(self.view, self.offset)
+        start = self.offset + 2
+        self.offset = start + length
+        return list(self.view[start:self.offset])
+
+    def _decode_list(self) -> List[Any]:
+        length, = _uint32.unpack_from(self.view, self.offset)
+        self.offset += 4
+        items = [self._decode_term() for _ in range(length)]
+
+        # Proper lists end with NIL_EXT, improper tails are dropped since Discord never sends them.
+        if self.view[self.offset] == NIL_EXT:
+            self.offset += 1
+        else:
+            self._decode_term()
+
+        return items
+
+    def _decode_binary(self) -> str:
+        length, = _uint32.unpack_from(self.view, self.offset)
+        start = self.offset + 4
+        self.offset = start + length
+        return str(self.view[start:self.offset], 'utf-8')
+
+    def _big(self, length: int, sign: int) -> Union[int, str]:
+        start = self.offset
+        self.offset += length
+        value = int.from_bytes(self.view[start:self.offset], 'little')
+        value = -value if sign else value
+        return str(value) if self.bigints_as_str else value
+
+    def _decode_small_big(self) -> int:
+        length, sign = _uint8_uint8.unpack_from(self.view, self.offset)
+        self.offset += 2
+        return self._big(length, sign)
+
+    def _decode_large_big(self) -> int:
+        length, sign = _uint32_uint8.unpack_from(self.view, self.offset)
+        self.offset += 5
+        return self._big(length, sign)
+
+    def _decode_map(self) -> Dict[Any, Any]:
+        arity, = _uint32.unpack_from(self.view, self.offset)
+        self.offset += 4
+        decode_term = self._decode_term
+        return {decode_term(): decode_term() for _ in range(arity)}
+
+_HANDLERS: Dict[int, Callable[[_Decoder], Any]] = {
+    NEW_FLOAT_EXT: _Decoder._decode_new_float,
+    SMALL_INTEGER_EXT: _Decoder._decode_small_integer,
+    INTEGER_EXT: _Decoder._decode_integer,
+    FLOAT_EXT: _Decoder._decode_float,
+    ATOM_EXT: _Decoder._decode_atom,
+    SMALL_TUPLE_EXT: _Decoder._decode_small_tuple,
+    LARGE_TUPLE_EXT: _Decoder._decode_large_tuple,
+    NIL_EXT: lambda decoder: [],
+    STRING_EXT: _Decoder._decode_string,
+    LIST_EXT: _Decoder._decode_list,
+    BINARY_EXT: _Decoder._decode_binary,
+    SMALL_BIG_EXT: _Decoder._decode_small_big,
+    LARGE_BIG_EXT: _Decoder._decode_large_big,
+    SMALL_ATOM_EXT: _Decoder._decode_small_atom,
+    MAP_EXT: _Decoder._decode_map,
+    ATOM_UTF8_EXT: _Decoder._decode_atom,
+    SMALL_ATOM_UTF8_EXT: _Decoder._decode_small_atom,
+}
+
+def decode(data: Union[bytes, bytearray, memoryview], *, bigints_as_str: bool = False) -> Any:
+    try:
+        return _Decoder(data, bigints_as_str).decode()
+    except (IndexError, StructError, UnicodeDecodeError, zlib.error) as e:
+        raise ETFDecodeError(f'Malformed ETF payload: {e}') from e
+
+def _encode_atom(buffer: bytearray, name: bytes) -> None:
+    buffer += _uint8_uint8.pack(SMALL_ATOM_UTF8_EXT, len(name))
+    buffer += name
+
+def _encode_term(buffer: bytearray, obj: Any) -> None:
+    if obj is None:
+        _encode_atom(buffer, b'nil')
+    elif obj is True:
+        _encode_atom(buffer, b'true')
+    elif obj is False:
+        _encode_atom(buffer, b'false')
+    elif isinstance(obj, int):
+        if 0 <= obj <= 255:
+            buffer += _uint8_uint8.pack(SMALL_INTEGER_EXT, obj)
+        elif -2 ** 31 <= obj < 2 ** 31:
+            buffer += _uint8.pack(INTEGER_EXT)
+            buffer += _int32.pack(obj)
+        else:
+            magnitude = abs(obj)
+            data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'little')
+            buffer += _uint8_uint8.pack(SMALL_BIG_EXT, len(data))
+            buffer += _uint8.pack(obj < 0)
+            buffer += data
+    elif isinstance(obj, float):
+        buffer += _uint8.pack(NEW_FLOAT_EXT)
+        buffer += _float64.pack(obj)
+    elif isinstance(obj, (str, bytes, bytearray, memoryview)):
+        data = obj.encode() if isinstance(obj, str) else obj
+        buffer += _uint8.pack(BINARY_EXT)
+        buffer += _uint32.pack(len(data))
+        buffer += data
+    elif isinstance(obj, dict):
+        buffer += _uint8.pack(MAP_EXT)
+        buffer += _uint32.pack(len(obj))
+        for key, value in obj.items():
+            _encode_term(buffer, key)
+            _encode_term(buffer, value)
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            buffer += _uint8.pack(NIL_EXT)
+            return
+
+        buffer += _uint8.pack(LIST_EXT)
+        buffer += _uint32.pack(len(obj))
+        for item in obj:
+            _encode_term(buffer, item)
+        buffer += _uint8.pack(NIL_EXT)
+    else:
+        raise TypeError(f'Object of type {obj.__class__.__name__!r} cannot be encoded as ETF.')
+
+def encode(obj: Any) -> bytes:
+    buffer = bytearray((FORMAT_VERSION,))
+    _encode_term(buffer, obj)
+    return bytes(buffer)
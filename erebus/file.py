@@ -0,0 +1,145 @@
+import mmap
+import os
+from asyncio import get_event_loop
+from typing import AsyncIterator, BinaryIO, Optional, Union
+
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.payload import Payload
+
+__all__ = ('File',)
+
+CHUNK_SIZE = 1 << 16
+
+FileSource = Union[str, 'os.PathLike[str]', BinaryIO, bytes, bytearray, memoryview]
+
+class File:
+    __slots__ = ('fp', 'filename', 'spoiler', 'use_mmap', 'chunk_size', '_view', '_handle', '_mmap', '_start')
+
+    def __init__(
+        self,
+        fp: FileSource,
+        filename: Optional[str] = None,
+        *,
+        spoiler: bool = False,
+        use_mmap: bool = False,
+        chunk_size: int = CHUNK_SIZE
+    ) -> None:
+        self.fp = fp
+        self.spoiler = spoiler
+        self.use_mmap = use_mmap
+        self.chunk_size = chunk_size
+        self._view: Optional[memoryview] = None
+        self._handle: Optional[BinaryIO] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._start = 0
+
+        if isinstance(fp, (bytes, bytearray, memoryview)):
+            view = memoryview(fp)
+            self._view = view if view.format == 'B' and view.ndim == 1 else view.cast('B')
+        elif isinstance(fp, (str, os.PathLike)):
+            filename = filename or os.path.basename(fp)
+        else:
+            # File objects we didn't open are left open, but always rewound to where the caller left them.
+            self._handle = fp
+            self._start = fp.tell()
+            filename = filename or os.path.basename(getattr(fp, 'name', '') or '')
+
+        filename = filename or 'untitled'
+        self.filename = f'SPOILER_{filename}' if spoiler and not filename.startswith('SPOILER_') else filename
+
+    @property
+    def owned(self) -> bool:
+        return isinstance(self.fp, (str, os.PathLike))
+
+    def _open(self) -> None:
+        if self._view is not None or self._handle is not None:
+            return
+
+        handle = open(self.fp, 'rb')
+        if not self.use_mmap:
+            self._handle = handle
+            return
+
+        try:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            self._view = memoryview(b'')
+        else:
+            self._view = memoryview(self._mmap)
+        finally:
+            handle.close()
+
+    @property
+    def size(self) -> int:
+        self._open()
+        if self._view is not None:
+            return self._view.nbytes
+
+        handle = self._handle
+        try:
+            return os.fstat(handle.fileno()).st_size - self._start
+        except (AttributeError, OSError):
+            position = handle.tell()
+            end = handle.seek(0, os.SEEK_END)
+            handle.seek(position)
+            return end - self._start
+
+    def reset(self) -> None:
+        self._open()
+        if self._handle is not None:
+            self._handle.seek(self._start)
+
+    async def chunks(self) -> AsyncIterator[Union[bytes, memoryview]]:
+        self._open()
+        chunk_size = self.chunk_size
+
+        if self._view is not None:
+            view = self._view
+            for start in range(0, view.nbytes, chunk_size):
+                yield view[start:start + chunk_size]
+            return
+
+        loop = get_event_loop()
+        remaining = self.size
+        while remaining > 0:
+            chunk = await loop.run_in_executor(None, self._handle.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        if not self.owned:
+            return
+
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+        view, mmapped = self._view, self._mmap
+        self._view = self._mmap = None
+
+        # A chunk the transport still holds keeps the map exported, it's unmapped on collection instead.
+        try:
+            if view is not None:
+                view.release()
+            if mmapped is not None:
+                mmapped.close()
+        except BufferError:
+            pass
+
+    def payload(self) -> Payload:
+        return _FilePayload(self)
+
+class _FilePayload(Payload):
+    def __init__(self, file: File) -> None:
+        super().__init__(file, content_type='application/octet-stream', filename=file.filename)
+        self._size = file.size
+
+    def decode(self, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        raise TypeError('File payloads are streamed and cannot be decoded.')
+
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        async for chunk in self._value.chunks():
+            await writer.write(chunk)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from enum import Flag as EnumFlag
 from typing import Optional, Type, Union
 
-from .enums import Intents, MessageFlags as _MessageFlags
+from .enums import CacheFlags as _CacheFlags, Intents, MessageFlags as _MessageFlags
 
 class Flag:
 
@@ -66,6 +66,7 @@ class BaseFlag:
 
         self = cls()
         setattr(self, 'value', value)
+        return self
 
 class Intents(BaseFlag, flag_cls=Intents):
     members = FlagAlias(Intents.GUILD_MEMBERS) # Let's just shorten the `guild_` prefix 
@@ -96,5 +97,23 @@ class Intents(BaseFlag, flag_cls=Intents):
         intents.presences = False
         return intents
 
-class MessageFlags(BaseFlag, enum=_MessageFlags):
+class MessageFlags(BaseFlag, flag_cls=_MessageFlags):
     pass
+
+class CacheFlags(BaseFlag, flag_cls=_CacheFlags):
+    @classmethod
+    def all(cls) -> CacheFlags:
+        return cls(**{name: True for name in cls.flag_names})
+
+    @classmethod
+    def none(cls) -> CacheFlags:
+        return cls()
+
+    @classmethod
+    def from_intents(cls, intents: Intents) -> CacheFlags:
+        flags = cls.all()
+        flags.members = intents.members
+        flags.emojis = intents.emojis
+        flags.messages = intents.messages
+        flags.voice_states = intents.voice_states
+        return flags
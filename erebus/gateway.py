@@ -1,35 +1,126 @@
-from aiohttp import ClientWebSocketResponse, WSMsgType
+from aiohttp import ClientError, ClientWebSocketResponse, WSMsgType
 import asyncio
-from json import loads
+from collections import deque
+from random import random, uniform
 import sys
-from typing import TYPE_CHECKING
+from time import perf_counter
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Sequence, Union
+import zlib
 
+from . import etf
 from .enums import DiscordOpcode, Intents
 
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+# Authentication failed, invalid shard, sharding required, invalid API version, invalid or disallowed intents.
+FATAL_CLOSE_CODES = (4004, 4010, 4011, 4012, 4013, 4014)
+# Invalid sequence and session timed out, the session is gone but a fresh IDENTIFY works.
+SESSION_CLOSE_CODES = (4007, 4009)
+
 class GatewayWebSocket:
-    def __init__(self, client) -> None:
+    def __init__(
+        self,
+        client,
+        *,
+        shard_id: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        compress: bool = False,
+        encoding: str = 'json'
+    ) -> None:
+        if encoding not in ('json', 'etf'):
+            raise ValueError(f'{encoding!r} is not a supported gateway encoding.')
+
         self.client = client
-        self.socket = self.seq = self._keep_alive_task = None
-        self._keeping_alive = False
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.compress = compress
+        self.encoding = encoding
+        self.socket = self.seq = self.session_id = self.close_code = self._keep_alive_task = None
+        self.established = False
+        self._closing = False
+        self.latency = float('inf')
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.missed_acks = 0
+        self._last_heartbeat = None
+        self._ack_received = True
+        self._buffer = bytearray()
+        self._inflator = None
+        self.bytes_received = 0
+        self.bytes_decompressed = 0
     
     async def connect(self, socket: ClientWebSocketResponse) -> None:
         self.socket = socket
-        msg = await socket.receive()
-        await self._handle_message(msg)
+        self._buffer.clear()
+        self._inflator = zlib.decompressobj() if self.compress else None
+
+        self.close_code = None
+        self.established = False
+        self._closing = False
+        self._ack_received = True
+
+        try:
+            data = await self._receive()
+            if data is None:
+                return
+            await self._handle_message(data)
+
+            if self.session_id is not None:
+                await self.resume()
+            else:
+                await self.identify()
+
+            while True:
+                data = await self._receive()
+
+                if data is None:
+                    break
+                
+                await self._handle_message(data)
+        finally:
+            if self._closing:
+                # The keep-alive closed a zombie connection, which wakes us up before the close frame is written.
+                await self._keep_alive_task
+            elif self._keep_alive_task is not None:
+                self._keep_alive_task.cancel()
+
+        self.close_code = socket.close_code
+        if self.close_code in SESSION_CLOSE_CODES:
+            self.invalidate_session()
+
+    def invalidate_session(self) -> None:
+        self.session_id = self.seq = None
 
-        await self.identify()
+    async def _receive(self) -> Optional[Union[str, bytes]]:
         while True:
             msg = await self.socket.receive()
 
             if msg.type in (WSMsgType.CLOSE, WSMsgType.CLOSED, WSMsgType.closing):
-                return
+                return None
             elif msg.type is WSMsgType.ERROR:
                 raise msg.data
-            
-            await self._handle_message(msg)
+
+            if msg.type is WSMsgType.TEXT:
+                # Text frames arrive decoded, count what was actually on the wire.
+                self.bytes_received += len(msg.data.encode())
+                return msg.data
+
+            self.bytes_received += len(msg.data)
+            if self._inflator is None:
+                return msg.data
+
+            # A zlib-stream payload can be split over several frames, only the last one ends with the flush suffix.
+            self._buffer.extend(msg.data)
+            if len(msg.data) < 4 or msg.data[-4:] != ZLIB_SUFFIX:
+                continue
+
+            data = self._inflator.decompress(self._buffer)
+            self._buffer.clear()
+            self.bytes_decompressed += len(data)
+            return data
         
-    async def _handle_message(self, msg):
-        msg = loads(msg.data)
+    async def _handle_message(self, data: Union[str, bytes]):
+        # Snowflakes arrive as big integers over ETF but as strings in JSON and REST, ids stay strings everywhere.
+        msg = etf.decode(data, bigints_as_str=True) if self.encoding == 'etf' else self.client.json.loads(data)
         op = msg.get('op')
         data = msg.get('d')
         seq = msg.get('s')
@@ -38,12 +129,24 @@ class GatewayWebSocket:
             self.seq = seq
         
         if op == DiscordOpcode.HELLO:
-            await self.send_heartbeat()
             self.heartbeat_interval = data['heartbeat_interval'] / 1000
             self._keep_alive_task = asyncio.create_task(self._keep_alive())
+
+        elif op == DiscordOpcode.HEARTBEAT_ACK:
+            self._ack_received = True
+            if self._last_heartbeat is not None:
+                self.latency = perf_counter() - self._last_heartbeat
+                self.latencies.append(self.latency)
         
-        elif op in (DiscordOpcode.INVALID_SESSION, DiscordOpcode.RECONNECT):
-            await self.close()
+        elif op == DiscordOpcode.RECONNECT:
+            # Anything but 1000/1001 keeps the session alive on Discord's side so it can be resumed.
+            await self.close(4000)
+
+        elif op == DiscordOpcode.INVALID_SESSION:
+            if not data:
+                self.invalidate_session()
+                await asyncio.sleep(uniform(1, 5))
+            await self.close(4000)
         
         elif op == DiscordOpcode.HEARTBEAT:
             await self.send_heartbeat()
@@ -55,7 +158,12 @@ class GatewayWebSocket:
 
         if event == 'READY':
             self.session_id = data['session_id']
-            return await self.client.dispatch_event('ready')
+            self.established = True
+            return await self.client._shard_ready(self.shard_id, data)
+
+        if event == 'RESUMED':
+            self.established = True
+            return await self.client.dispatch_event('resumed', self.shard_id)
 
         handler = getattr(self.client, f'_handle_{event.lower()}', self.client.dispatch_event)
 
@@ -67,17 +175,50 @@ class GatewayWebSocket:
     
 
     async def _keep_alive(self) -> None:
-        while not await asyncio.sleep(self.heartbeat_interval):
-            await self.send_heartbeat()
+        # Discord asks for the first heartbeat after a random fraction of the interval so shards don't beat in lockstep.
+        await asyncio.sleep(self.heartbeat_interval * random())
+
+        while True:
+            if not self._ack_received:
+                # No ACK for the last heartbeat means the connection is a zombie, reconnect and resume.
+                self.missed_acks += 1
+                return await self.close(4000)
+
+            try:
+                await self.send_heartbeat()
+            except (OSError, ClientError):
+                # A half-closed transport refuses writes, close it so the reconnect loop takes over.
+                return await self.close(4000)
+
+            await asyncio.sleep(self.heartbeat_interval)
 
     async def send_heartbeat(self) -> None:
         payload = {
             'op': DiscordOpcode.HEARTBEAT,
             'd': self.seq 
         }
-        await self.socket.send_json(payload)
+        self._ack_received = False
+        self._last_heartbeat = perf_counter()
+        await self.send(payload)
+
+    def latency_histogram(self, bounds: Sequence[float] = (0.05, 0.1, 0.25, 0.5, 1.0)) -> Dict[float, int]:
+        histogram = dict.fromkeys(bounds, 0)
+        histogram[float('inf')] = 0
+
+        for latency in self.latencies:
+            for bound in histogram:
+                if latency <= bound:
+                    histogram[bound] += 1
+                    break
+
+        return histogram
+
+    async def send(self, payload: dict) -> None:
+        if self.encoding == 'etf':
+            await self.socket.send_bytes(etf.encode(payload))
+        else:
+            await self.socket.send_str(self.client.json.dumps(payload))
 
-        
 
     async def identify(self) -> None:
         payload = {
@@ -92,17 +233,64 @@ class GatewayWebSocket:
                     '$referring_domain': ''
                 },
                 'compress': False,
-                'large_threshold': 250,
+                'large_threshold': self.client.large_threshold,
                 'guild_subscriptions': True,
                 'v': 3
             }
         }
 
         payload['d']['intents'] = self.client.intents.value
-        await self.socket.send_json(payload)
+
+        if self.shard_count is not None:
+            payload['d']['shard'] = [self.shard_id, self.shard_count]
+
+        await self.client._before_identify(self.shard_id)
+        await self.send(payload)
     
+    async def request_guild_members(
+        self,
+        guild_ids: Union[int, List[int]],
+        *,
+        query: str = '',
+        limit: int = 0,
+        presences: bool = False,
+        user_ids: Optional[List[int]] = None,
+        nonce: Optional[str] = None
+    ) -> None:
+        payload = {
+            'op': DiscordOpcode.REQUEST_GUILD_MEMBERS,
+            'd': {
+                'guild_id': guild_ids,
+                'presences': presences
+            }
+        }
+
+        if user_ids is not None:
+            payload['d']['user_ids'] = user_ids
+        else:
+            payload['d']['query'] = query
+            payload['d']['limit'] = limit
+
+        if nonce is not None:
+            payload['d']['nonce'] = nonce
+
+        await self.send(payload)
+
+    async def resume(self) -> None:
+        payload = {
+            'op': DiscordOpcode.RESUME,
+            'd': {
+                'token': self.client.token,
+                'session_id': self.session_id,
+                'seq': self.seq
+            }
+        }
+        await self.send(payload)
+
     async def close(self, code: int = 1000) -> None:
-        if self._keep_alive_task is not None:
+        if self._keep_alive_task is asyncio.current_task():
+            self._closing = True
+        elif self._keep_alive_task is not None:
             self._keep_alive_task.cancel()
         await self.socket.close(code=code)
     
\ No newline at end of file
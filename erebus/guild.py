@@ -1,40 +1,99 @@
+from asyncio import Future
+from secrets import token_hex
+from typing import Dict, List
+
+from .channel import GuildChannel
+from .member import Member
+
+class ChunkRequest:
+    def __init__(self, guild_ids: List, future: Future) -> None:
+        self.nonce = token_hex(16)
+        self.future = future
+        self.members: List[Member] = []
+        # GUILD_MEMBERS_CHUNK sends ids as strings, so ints passed in have to match them.
+        self._pending = {str(guild_id) for guild_id in guild_ids}
+        self._received: Dict = {}
+
+    def add(self, data: dict, members: List[Member]) -> None:
+        self.members.extend(members)
+
+        guild_id = str(data['guild_id'])
+        self._received[guild_id] = received = self._received.get(guild_id, 0) + 1
+        if received >= data['chunk_count']:
+            self._pending.discard(guild_id)
+
+        if not self._pending and not self.future.done():
+            self.future.set_result(self.members)
+
 class Guild:
     __slots__ = ('id', 'name', 'icon', 'owner', 'client_is_owner', 'permissions', 'region', 'afk_channel',
                 'afk_timeout', 'verification_level', 'roles', 'emojis', 'system_channel', 'features',
                 'mfa_level', 'created', 'large', 'member_count', 'voice_states', 'members', 'channels',
                 'max_members', 'vanity_url_code', 'description', 'banner',
-                'premium_tier', 'premium_subscription_count')
+                'premium_tier', 'premium_subscription_count', 'shard_id')
     
     def __new__(cls):
         raise Exception('Guilds should not be created manually.')
 
     @classmethod
-    def _create_guild(cls, data: dict):
+    def _create_guild(cls, client, data: dict, shard_id: int = 0):
         guild = object.__new__(cls)
+        guild.shard_id = shard_id
         guild.id = data.get('id')
         guild.name = data.get('name')
         guild.icon = data.get('icon')
         guild.owner = data.get('owner_id')
         guild.client_is_owner = data.get('owner')
         guild.permissions = data.get('permissions')
-        guild.members = data.get('members')
+        guild.members = {}
         guild.region = data.get('region')
         guild.afk_channel = data.get('afk_channel_id')
         guild.afk_timeout = data.get('afk_timeout')
         guild.verification_level = data.get('verification_level')
-        guild.roles = data.get('roles')
-        guild.emojis = data.get('emojis')
+        guild.roles = {}
+        guild.emojis = {}
         guild.features = data.get('features')
         guild.mfa_level = data.get('mfa_level')
         guild.created = data.get('joined_at')
         guild.large = data.get('large')
         guild.member_count = data.get('member_count')
-        guild.voice_states = data.get('voice_states')
-        guild.channels = data.get('channels')
+        guild.voice_states = {}
+        guild.channels = {}
         guild.max_members = data.get('max_members')
         guild.vanity_url_code = data.get('vanity_code_url')
         guild.description = data.get('description')
         guild.banner = data.get('banner')
         guild.premium_tier = data.get('premium_tier')
         guild.premium_subscription_count = data.get('premium_subscription_count')
+
+        cache_flags = client.cache_flags
+
+        if cache_flags.roles:
+            guild.roles = {role['id']: role for role in data.get('roles', ())}
+
+        if cache_flags.emojis:
+            guild.emojis = {emoji['id']: emoji for emoji in data.get('emojis', ())}
+
+        if cache_flags.voice_states:
+            guild.voice_states = {state['user_id']: state for state in data.get('voice_states', ())}
+
+        if cache_flags.channels:
+            for channel_data in data.get('channels', ()):
+                channel = GuildChannel._create_channel(channel_data, guild)
+                guild.channels[channel.id] = channel
+                client.channels[channel.id] = channel
+
+        if cache_flags.members:
+            for member_data in data.get('members', ()):
+                guild._add_member(client, member_data)
+
         return guild
+
+    @property
+    def chunked(self) -> bool:
+        return self.member_count is not None and len(self.members) >= self.member_count
+
+    def _add_member(self, client, data: dict) -> Member:
+        member = Member._create_member(data, client._store_user(data['user']), self)
+        self.members[member.id] = member
+        return member
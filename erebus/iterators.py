@@ -0,0 +1,54 @@
+from asyncio import ensure_future
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Union
+
+from .utils import Snowflake, datetime_to_snowflake
+
+MAX_PAGE_SIZE = 100
+
+PageFetcher = Callable[[int, Optional[Snowflake]], Awaitable[List[Any]]]
+
+def to_snowflake(value: Union[Snowflake, datetime, None], *, high: bool = False) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return datetime_to_snowflake(value, high=high)
+    return int(value)
+
+async def paginate(
+    fetch: PageFetcher,
+    cursor: Optional[Snowflake] = None,
+    *,
+    limit: Optional[int] = None,
+    page_size: int = MAX_PAGE_SIZE,
+    next_cursor: Callable[[List[Any]], Snowflake] = lambda page: page[-1]['id']
+) -> AsyncIterator[Any]:
+    # fetch must return pages in iteration order, so the last item of a page is always where the next one starts.
+    remaining = limit
+
+    def request(cursor: Optional[Snowflake]):
+        amount = page_size if remaining is None else min(page_size, remaining)
+        return amount, ensure_future(fetch(amount, cursor))
+
+    if remaining is not None and remaining <= 0:
+        return
+
+    amount, task = request(cursor)
+
+    try:
+        while task is not None:
+            page = await task
+            task = None
+
+            if remaining is not None:
+                remaining -= len(page)
+
+            # Kick off the next page before handing this one over, so the request overlaps with the consumer.
+            if len(page) >= amount and (remaining is None or remaining > 0):
+                amount, task = request(next_cursor(page))
+
+            for item in page:
+                yield item
+    finally:
+        if task is not None:
+            task.cancel()
@@ -0,0 +1,23 @@
+class Member:
+    __slots__ = ('user', 'guild', 'nick', 'roles', 'joined_at', 'premium_since', 'deaf', 'mute', 'pending')
+
+    def __new__(cls):
+        raise Exception('Members should not be created manually.')
+
+    @classmethod
+    def _create_member(cls, data: dict, user, guild):
+        member = object.__new__(cls)
+        member.user = user
+        member.guild = guild
+        member.nick = data.get('nick')
+        member.roles = data.get('roles', [])
+        member.joined_at = data.get('joined_at')
+        member.premium_since = data.get('premium_since')
+        member.deaf = data.get('deaf')
+        member.mute = data.get('mute')
+        member.pending = data.get('pending')
+        return member
+
+    @property
+    def id(self):
+        return self.user.id
@@ -1,36 +1,59 @@
 from datetime import datetime
+from typing import Optional
+
 from .flags import MessageFlags
-from dateutil.parser import isoparse
+from .utils import cached_slot_property, parse_time, snowflake_to_datetime
 
 class Message:
-    __slots__ = ('type', 'tts', 'created', 'referenced_message', 'pinned', 'nonce', 'mentions', 'mention_roles',
-                'author', 'attachments', 'guild', 'content', 'mention_channel', 'id', 'mention_everyone',
-                'edited', 'embeds', 'flags', 'channel')
+    __slots__ = ('type', 'tts', 'pinned', 'nonce', 'mentions', 'mention_roles',
+                'attachments', 'content', 'mention_channel', 'id', 'mention_everyone',
+                'embeds', 'channel', 'channel_id', '_data', '_client', '_cs_created_at', '_cs_edited_at',
+                '_cs_flags', '_cs_author', '_cs_guild', '_cs_referenced_message')
     
     def __new__(cls):
         raise Exception("Messages should not be created manually.") # TODO: Make exceptions
 
     @classmethod
-    def _create_message(cls, client, data: dict):
+    def _create_message(cls, client, data: dict, *, cache: bool = True):
+        # Only the cheap fields are set here, everything else is built from the payload on first access.
         message = object.__new__(cls)
+        message._data = data
+        message._client = client
         message.id = data.get('id')
         message.type = data.get('type')
         message.tts = data.get('tts')
-        message.created_at = isoparse(data.get('timestamp'))
-        message.referenced_message = data.get('referenced_message')
         message.mention_everyone = data.get('mention_everyone')
-        message.guild = client.guilds.get(data.get('guild_id'))
-        message.author = data.get('author')
-        message.channel = data.get('channel_id')
+        message.channel_id = data.get('channel_id')
+        message.channel = client.channels.get(message.channel_id, message.channel_id)
         message.content = data.get('content')
 
-        message.flags = MessageFlags._from_value(data.get('flags'))
+        if cache:
+            client.messages.add(message)
+        return message
 
-        edited_at = data.get('edited_timestamp')
-        message.edited_at = None
+    @cached_slot_property('_cs_created_at')
+    def created_at(self) -> datetime:
+        return snowflake_to_datetime(self.id)
 
-        if edited_at is not None:
-            message.edited_at = isoparse(edited_at)
+    @cached_slot_property('_cs_edited_at')
+    def edited_at(self) -> Optional[datetime]:
+        return parse_time(self._data.get('edited_timestamp'))
 
-        client.messages[message.id] = message
-        return message
+    @cached_slot_property('_cs_flags')
+    def flags(self) -> Optional[MessageFlags]:
+        return MessageFlags._from_value(self._data.get('flags'))
+
+    @cached_slot_property('_cs_author')
+    def author(self):
+        # The raw payload is dropped once materialized, so long-lived cached messages don't hold it twice.
+        author = self._data.pop('author', None)
+        return self._client._store_user(author) if author is not None else None
+
+    @cached_slot_property('_cs_guild')
+    def guild(self):
+        return self._client.guilds.get(self._data.get('guild_id'))
+
+    @cached_slot_property('_cs_referenced_message')
+    def referenced_message(self) -> Optional['Message']:
+        referenced = self._data.pop('referenced_message', None)
+        return Message._create_message(self._client, referenced, cache=False) if referenced else None
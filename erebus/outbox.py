@@ -0,0 +1,147 @@
+from asyncio import CancelledError, Future, Task, sleep
+from typing import Any, Dict, List, Optional
+
+from .message import Message
+
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+
+class _PendingMessage:
+    __slots__ = ('content', 'embeds', 'tts', 'allowed_mentions', 'message_reference', 'nonce', 'futures')
+
+    def __init__(
+        self,
+        content: Optional[str],
+        embeds: List[dict],
+        tts: bool,
+        allowed_mentions: Optional[dict],
+        message_reference: Optional[dict],
+        nonce: Optional[str],
+        future: Future
+    ) -> None:
+        self.content = content
+        self.embeds = embeds
+        self.tts = tts
+        self.allowed_mentions = allowed_mentions
+        self.message_reference = message_reference
+        self.nonce = nonce
+        self.futures = [future]
+
+    def merge(self, other: '_PendingMessage') -> bool:
+        # Replies and nonced sends are tied to one message, and mention or tts settings apply to the whole message.
+        if self.message_reference or other.message_reference or self.nonce or other.nonce:
+            return False
+
+        if self.tts != other.tts or self.allowed_mentions != other.allowed_mentions:
+            return False
+
+        if len(self.embeds) + len(other.embeds) > MAX_EMBEDS:
+            return False
+
+        content = self.content
+        if other.content:
+            # Text always renders above embeds, so it can't be appended once this message has some.
+            if self.embeds:
+                return False
+
+            content = f'{content}\n{other.content}' if content else other.content
+            if len(content) > MAX_CONTENT_LENGTH:
+                return False
+
+        self.content = content
+        self.embeds = self.embeds + other.embeds
+        self.futures += other.futures
+        return True
+
+class Outbox:
+    def __init__(self, client, *, window: float = 0.25) -> None:
+        self.client = client
+        self.window = window
+        self._pending: Dict[Any, List[_PendingMessage]] = {}
+        self._tasks: Dict[Any, Task] = {}
+
+        self.queued = 0
+        self.sent = 0
+
+    def put(
+        self,
+        channel_id: Any,
+        content: Optional[str] = None,
+        *,
+        tts: bool = False,
+        embed: Optional[dict] = None,
+        embeds: Optional[List[dict]] = None,
+        nonce: Optional[str] = None,
+        allowed_mentions: Optional[dict] = None,
+        message_reference: Optional[dict] = None
+    ) -> 'Future[Message]':
+        future = self.client.loop.create_future()
+        embeds = list(embeds or ())
+        if embed:
+            embeds.append(embed)
+
+        message = _PendingMessage(content or None, embeds, tts, allowed_mentions, message_reference, nonce, future)
+        pending = self._pending.setdefault(channel_id, [])
+        if not pending or not pending[-1].merge(message):
+            pending.append(message)
+
+        self.queued += 1
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = self.client.loop.create_task(self._flush(channel_id))
+
+        return future
+
+    async def _flush(self, channel_id: Any) -> None:
+        try:
+            # Anything queued while a flush is being sent waits for the next window, so slow buckets batch up more.
+            while True:
+                await sleep(self.window)
+                pending = self._pending.pop(channel_id, None)
+                if not pending:
+                    return
+
+                for index, message in enumerate(pending):
+                    try:
+                        await self._send(channel_id, message)
+                    except CancelledError:
+                        for remaining in pending[index:]:
+                            self._cancel(remaining)
+                        raise
+        finally:
+            self._tasks.pop(channel_id, None)
+
+    async def _send(self, channel_id: Any, message: _PendingMessage) -> None:
+        try:
+            data = await self.client.rest.create_message(
+                channel_id,
+                message.content,
+                tts=message.tts,
+                embeds=message.embeds or None,
+                nonce=message.nonce,
+                allowed_mentions=message.allowed_mentions,
+                message_reference=message.message_reference
+            )
+        except Exception as error:
+            for future in message.futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.sent += 1
+        result = Message._create_message(self.client, data)
+        for future in message.futures:
+            if not future.done():
+                future.set_result(result)
+
+    def _cancel(self, message: _PendingMessage) -> None:
+        for future in message.futures:
+            future.cancel()
+
+    def close(self) -> None:
+        for task in tuple(self._tasks.values()):
+            task.cancel()
+
+        for pending in self._pending.values():
+            for message in pending:
+                self._cancel(message)
+        self._pending.clear()
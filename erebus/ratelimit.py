@@ -0,0 +1,217 @@
+import asyncio
+import re
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+from multidict import CIMultiDictProxy
+
+MAJOR_PARAMETERS = ('channels', 'guilds', 'webhooks')
+
+BUCKET_SWEEP_INTERVAL = 60
+
+_ID_REGEX = re.compile(r'(?<=/)\d+(?=/|$)')
+_MAJOR_REGEX = re.compile(rf'^/?({"|".join(MAJOR_PARAMETERS)})/(\d+)')
+_REACTION_REGEX = re.compile(r'(?<=/reactions/)[^/]+')
+
+def get_route_key(method: str, path: str) -> Tuple[str, Optional[str]]:
+    # /channels/1234/messages/5678 -> ('GET /channels/{id}/messages/{id}', 'channels:1234')
+    path = path.split('?', 1)[0].lstrip('/')
+    match = _MAJOR_REGEX.match(path)
+    major = f'{match[1]}:{match[2]}' if match else None
+    template = _REACTION_REGEX.sub('{emoji}', _ID_REGEX.sub('{id}', '/' + path))
+    return f'{method} {template}', major
+
+class Bucket:
+    __slots__ = ('key', 'limit', 'remaining', 'reset_at', '_lock', '_updated', '_users')
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.limit = None
+        # Until the first response tells us the real limits, only let one request through at a time.
+        self.remaining = 1
+        self.reset_at = None
+        self._lock = asyncio.Lock()
+        self._updated = asyncio.Event()
+        # Requests waiting on or holding this bucket, it can only be dropped once there are none.
+        self._users = 0
+
+    def is_idle(self, now: float) -> bool:
+        return not self._users and (self.reset_at is None or self.reset_at <= now)
+
+    async def acquire(self) -> None:
+        self._users += 1
+        try:
+            await self._acquire()
+        except BaseException:
+            self._users -= 1
+            raise
+
+    async def _acquire(self) -> None:
+        # Callers queue up on the lock, so whoever is waiting on an exhausted bucket goes out first.
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if self.reset_at is not None and self.reset_at <= now and self.limit is not None:
+                    self.remaining = self.limit
+                    self.reset_at = None
+
+                if self.remaining is None or self.remaining > 0:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return
+
+                if self.reset_at is None:
+                    self._updated.clear()
+                    await self._updated.wait()
+                else:
+                    await asyncio.sleep(self.reset_at - now)
+
+    def release(self) -> None:
+        self._users -= 1
+        if self.limit is None and self.remaining == 0:
+            self.remaining = 1
+        self._updated.set()
+
+    def update(self, headers: CIMultiDictProxy) -> None:
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+
+        if remaining is None or reset_after is None:
+            if self.limit is None:
+                self.remaining = None
+            return
+
+        remaining = int(remaining)
+        reset_at = monotonic() + float(reset_after)
+
+        if self.reset_at is None and self.limit is not None:
+            # We refilled the window locally, so requests sent after this one are already counted.
+            self.remaining = min(self.remaining, remaining)
+        else:
+            self.remaining = remaining
+
+        self.limit = int(headers.get('X-RateLimit-Limit', self.limit or remaining + 1))
+        self.reset_at = reset_at
+
+    def lock_for(self, delay: float) -> None:
+        self.remaining = 0
+        self.reset_at = max(self.reset_at or 0, monotonic() + delay)
+
+class RateLimiter:
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Bucket] = {}
+        self._hashes: Dict[str, str] = {}
+        self._last_sweep = monotonic()
+
+    def _bucket_key(self, route: str, major: Optional[str]) -> str:
+        return f'{self._hashes.get(route, route)}:{major}'
+
+    def _sweep(self, now: float) -> None:
+        # Every channel, guild and webhook touched gets its own buckets, so drop the ones nobody is using anymore.
+        self._last_sweep = now
+        for key, bucket in tuple(self._buckets.items()):
+            if bucket.is_idle(now):
+                del self._buckets[key]
+
+    def get_bucket(self, method: str, path: str) -> Bucket:
+        now = monotonic()
+        if now - self._last_sweep >= BUCKET_SWEEP_INTERVAL:
+            self._sweep(now)
+
+        route, major = get_route_key(method, path)
+        key = self._bucket_key(route, major)
+
+        try:
+            return self._buckets[key]
+        except KeyError:
+            bucket = self._buckets[key] = Bucket(key)
+            return bucket
+
+    def update(self, method: str, path: str, bucket: Bucket, headers: CIMultiDictProxy) -> Bucket:
+        bucket.update(headers)
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+
+        if bucket_hash is not None:
+            route, major = get_route_key(method, path)
+            if self._hashes.get(route) != bucket_hash:
+                self._hashes[route] = bucket_hash
+                # Routes sharing a hash share a bucket, so reuse one that another route already learned.
+                shared = self._buckets.setdefault(self._bucket_key(route, major), bucket)
+                if shared is not bucket:
+                    shared.update(headers)
+                    return shared
+
+        return bucket
+
+class GlobalRateLimiter:
+    def __init__(self, rate: float = 50, *, per: float = 1.0, max_concurrency: Optional[int] = None) -> None:
+        self.rate = rate / per
+        self.capacity = rate
+        self.max_concurrency = max_concurrency
+        self._tokens = float(rate)
+        self._last_refill = monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency is not None else None
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    @property
+    def is_paused(self) -> bool:
+        return self._paused_until > monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        start = monotonic()
+        self.queue_depth += 1
+
+        try:
+            if self._semaphore is not None:
+                await self._semaphore.acquire()
+
+            try:
+                async with self._lock:
+                    while True:
+                        now = monotonic()
+                        if self._paused_until > now:
+                            await asyncio.sleep(self._paused_until - now)
+                            continue
+
+                        self._refill(now)
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+
+                        await asyncio.sleep((1 - self._tokens) / self.rate)
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self.queue_depth -= 1
+
+        waited = monotonic() - start
+        self.requests += 1
+        self.in_flight += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def pause(self, delay: float) -> None:
+        self._paused_until = max(self._paused_until, monotonic() + delay)
+        self._tokens = 0.0
@@ -1,8 +1,14 @@
-from aiohttp import ClientSession, ContentTypeError
-from functools import partialmethod
-from typing import Any, Dict, List, Optional, Union
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession, ClientTimeout, FormData, TCPConnector
+from asyncio import TimeoutError, sleep
+from functools import partial, partialmethod
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
 
 from . import __version__
+from .cache import ResponseCache
+from .errors import Forbidden, HTTPException, NotFound, RateLimited, ServerError
+from .file import File
+from .ratelimit import GlobalRateLimiter, RateLimiter, get_route_key
+from .utils import ExponentialBackoff
 
 
 API_BASE_URL = "https://discord.com/api/v8"
@@ -12,30 +18,174 @@ def get_api_url(route: str):
 
 RequestResponse = Union[dict, str]
 
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+HTTP_ERRORS: Dict[int, Type[HTTPException]] = {
+    403: Forbidden,
+    404: NotFound,
+}
+
 class Rest:
-    def __init__(self, client):
+    def __init__(
+        self,
+        client,
+        *,
+        global_rate_limit: float = 50,
+        max_concurrent_requests: Optional[int] = None,
+        max_cached_responses: Optional[int] = 1000,
+        response_cache_ttl: Optional[float] = 60,
+        connector_limit: int = 100,
+        connector_limit_per_host: int = 0,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: Optional[int] = 300,
+        connect_timeout: Optional[float] = 10,
+        read_timeout: Optional[float] = 30,
+        request_timeout: Optional[float] = None,
+        max_retries: int = 5,
+        max_retry_delay: float = 10
+    ):
         self._session = None
+        self._headers: Dict[str, str] = {}
         self.token = None
         self.user_agent = f'DiscordBot (https://github.com/ToxicKidz/discord-api-py {__version__})'
         self.client = client
-    
-    async def request(self, method: str, url: str, **kwargs) -> RequestResponse:
-        headers = {
-            'User-Agent': self.user_agent,
-            'X-Ratelimit-Precision': 'millisecond',
-            'Authorization': 'Bot ' + self.client.token
-        }
+        self.ratelimiter = RateLimiter()
+        self.global_ratelimiter = GlobalRateLimiter(global_rate_limit, max_concurrency=max_concurrent_requests)
+        self.max_retries = max_retries
+        self.max_retry_delay = max_retry_delay
+        self.retries: Dict[str, int] = {}
+        self.cache = ResponseCache(max_cached_responses, ttl=response_cache_ttl, codec=client.json)
+        self.connector_limit = connector_limit
+        self.connector_limit_per_host = connector_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        # The read timeout bounds gaps between chunks rather than the whole request, so large uploads aren't cut off.
+        self.timeout = ClientTimeout(total=request_timeout, connect=connect_timeout, sock_read=read_timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def open(self) -> ClientSession:
+        if self.closed:
+            connector = TCPConnector(
+                limit=self.connector_limit,
+                limit_per_host=self.connector_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=self.dns_cache_ttl is not None
+            )
+            self._session = ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                json_serialize=self.client.json.dumps
+            )
+
+        return self._session
+
+    async def close(self) -> None:
+        if not self.closed:
+            await self._session.close()
+        self._session = None
 
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        files: Optional[Sequence[File]] = None,
+        **kwargs
+    ) -> RequestResponse:
+        headers = self._headers
         if 'headers' in kwargs:
-            headers.update(kwargs.pop('headers'))
+            headers = {**headers, **kwargs.pop('headers')}
+
+        payload = kwargs.pop('json', None) if files else None
+
+        path = url[len(API_BASE_URL):] if url.startswith(API_BASE_URL) else url
+        bucket = self.ratelimiter.get_bucket(method, path)
+        route, _ = get_route_key(method, path)
+        retryable = method in IDEMPOTENT_METHODS
+        backoff = ExponentialBackoff(0.5, self.max_retry_delay)
+
+        for tries in range(self.max_retries):
+            last_try = tries == self.max_retries - 1
+            if files:
+                # A multipart body can only be sent once, so every attempt rewinds the files and builds a new one.
+                for file in files:
+                    file.reset()
+                kwargs['data'] = self._multipart(payload, files)
+
+            acquired = bucket
+            await acquired.acquire()
+
+            try:
+                await self.global_ratelimiter.acquire()
+            except BaseException:
+                acquired.release()
+                raise
 
-        async with self._session.request(method, url, headers=headers, **kwargs)  as response:
-            response.raise_for_status()
             try:
-                return await response.json()
-            except ContentTypeError:
-                return await response.text()
+                async with self._session.request(method, url, headers=headers, **kwargs) as response:
+                    bucket = self.ratelimiter.update(method, path, bucket, response.headers)
+                    data = await self._read_response(response)
+
+                    if 200 <= response.status < 300:
+                        return data
+
+                    if response.status == 429:
+                        body = data if isinstance(data, dict) else {}
+                        retry_after = float(body.get('retry_after', response.headers.get('Retry-After', 1)))
+                        is_global = bool(body.get('global')) or 'X-RateLimit-Global' in response.headers
+
+                        if last_try:
+                            raise RateLimited(response, data, retry_after, is_global)
+
+                        if is_global:
+                            self.global_ratelimiter.pause(retry_after)
+                        else:
+                            bucket.lock_for(retry_after)
+                        self.retries[route] = self.retries.get(route, 0) + 1
+                        continue
+
+                    if response.status >= 500:
+                        if not retryable or last_try:
+                            raise ServerError(response, data)
+                    else:
+                        raise HTTP_ERRORS.get(response.status, HTTPException)(response, data)
+            except (ClientConnectionError, TimeoutError):
+                if not retryable or last_try:
+                    raise
+            finally:
+                self.global_ratelimiter.release()
+                acquired.release()
+
+            # Only transient failures of idempotent requests get here, they're retried once the slots are released.
+            self.retries[route] = self.retries.get(route, 0) + 1
+            await sleep(backoff.delay())
     
+    def _multipart(self, payload: Optional[dict], files: Sequence[File]) -> FormData:
+        form = FormData()
+        if payload is not None:
+            form.add_field('payload_json', self.client.json.dumps(payload), content_type='application/json')
+
+        for index, file in enumerate(files):
+            form.add_field('file' if len(files) == 1 else f'file{index}', file.payload(), filename=file.filename)
+
+        return form
+
+    async def _send_files(self, method: str, url: str, payload: dict, files: Sequence[File]) -> RequestResponse:
+        try:
+            return await self.request(method, url, json=payload, files=files)
+        finally:
+            for file in files:
+                file.close()
+
+    async def _read_response(self, response: ClientResponse) -> RequestResponse:
+        if response.content_type == 'application/json':
+            return self.client.json.loads(await response.read())
+        return await response.text()
+
     get = partialmethod(request, 'GET')
     put = partialmethod(request, 'PUT')
     post = partialmethod(request, 'POST')
@@ -43,7 +193,12 @@ class Rest:
     delete = partialmethod(request, 'DELETE')
     
     async def login(self) -> RequestResponse:
-        self._session = ClientSession()
+        self._headers = {
+            'User-Agent': self.user_agent,
+            'X-Ratelimit-Precision': 'millisecond',
+            'Authorization': 'Bot ' + self.client.token
+        }
+        await self.open()
         return await self.get(get_api_url('/users/@me'))
     
     async def logout(self) -> RequestResponse:
@@ -52,9 +207,20 @@ class Rest:
     async def get_gateway(self) -> RequestResponse:
         return await self.get(get_api_url('/gateway'))
     
-    async def ws_connect(self):
-        data = await self.get_gateway()
-        return await self._session.ws_connect(data['url'] + '?v=8')
+    async def get_gateway_bot(self) -> RequestResponse:
+        return await self.get(get_api_url('/gateway/bot'))
+    
+    async def ws_connect(self, url: Optional[str] = None, *, compress: bool = False, encoding: str = 'json'):
+        if url is None:
+            data = await self.get_gateway()
+            url = data['url']
+
+        url += '?v=8&encoding=' + encoding
+
+        if compress:
+            url += '&compress=zlib-stream'
+
+        return await self._session.ws_connect(url)
 
     async def get_audit_logs(
         self,
@@ -88,9 +254,12 @@ class Rest:
         *,
         tts=False,
         embed=None,
+        embeds=None,
         nonce=None,
         allowed_mentions=None,
-        message_reference=None
+        message_reference=None,
+        file: Optional[File] = None,
+        files: Optional[Sequence[File]] = None
     ):
         payload = {'tts': tts}
 
@@ -99,6 +268,9 @@ class Rest:
         
         if embed:
             payload['embed'] = embed
+
+        if embeds:
+            payload['embeds'] = embeds
         
         if nonce:
             payload['nonce'] = nonce
@@ -108,11 +280,17 @@ class Rest:
         
         if message_reference:
             payload['message_reference'] = message_reference
+
+        files = [file] if file is not None else files
+        if files:
+            return await self._send_files('POST', get_api_url(f'/channels/{channel_id}/messages'), payload, files)
         
         return await self.post(get_api_url(f'/channels/{channel_id}/messages'), json=payload)
 
     async def get_channel(self, channel_id: int):
-        return await self.get(get_api_url(f'/channels/{channel_id}'))
+        return await self.cache.get(
+            ('channel', str(channel_id)), partial(self.get, get_api_url(f'/channels/{channel_id}'))
+        )
     
     async def modify_channel(
         self,
@@ -161,10 +339,15 @@ class Rest:
         if parent_id is not None:
             payload['parent_id'] = parent_id
         
-        return await self.patch(get_api_url(f'/channels/{channel_id}'), json=payload)
+        data = await self.patch(get_api_url(f'/channels/{channel_id}'), json=payload)
+        self.cache.invalidate(('channel', str(channel_id)))
+        return data
 
     async def delete_channel(self, channel_id: int) -> RequestResponse:
-        return await self.delete(get_api_url(f'/channels/{channel_id}'))
+        channel_id = str(channel_id)
+        data = await self.delete(get_api_url(f'/channels/{channel_id}'))
+        self.cache.invalidate(('channel', channel_id), ('pins', channel_id), ('invites', channel_id))
+        return data
     
     async def get_messages(
         self,
@@ -172,16 +355,21 @@ class Rest:
         before: Optional[int] = None,
         after: Optional[int] = None,
         around: Optional[int] = None,
+        limit: Optional[int] = None
     ) -> RequestResponse:
-        
         params = {}
 
         if before is not None:
-            params = {'before': before}
-        elif after is not None:
-            params = {'after': after}
-        elif around is not None:
-            params = {'around': around}
+            params['before'] = before
+
+        if after is not None:
+            params['after'] = after
+
+        if around is not None:
+            params['around'] = around
+
+        if limit is not None:
+            params['limit'] = limit
 
         return await self.get(get_api_url(f'/channels/{channel_id}/messages'), params=params)
 
@@ -237,7 +425,9 @@ class Rest:
         content: Optional[str] = None,
         embed=None,
         allowed_mentions=None,
-        flags=None
+        flags=None,
+        file: Optional[File] = None,
+        files: Optional[Sequence[File]] = None
     ) -> RequestResponse:
         payload = {}
 
@@ -252,11 +442,17 @@ class Rest:
         
         if flags is not None:
             payload['flags'] = flags
+
+        files = [file] if file is not None else files
+        if files:
+            return await self._send_files(
+                'PATCH', get_api_url(f'/channels/{channel_id}/messages/{message_id}'), payload, files
+            )
         
-        return await self.patch(get_api_url(f'/channels/{channel_id}/messages/{message_id}'), params=payload)
+        return await self.patch(get_api_url(f'/channels/{channel_id}/messages/{message_id}'), json=payload)
 
     async def delete_message(self, channel_id: int, message_id: int):
-        return await self.delete(get_api_url(f'/channels/{channel_id}/message/{message_id}'))
+        return await self.delete(get_api_url(f'/channels/{channel_id}/messages/{message_id}'))
     
     async def bulk_delete_messages(self, channel_id: int, messages: List[int]):
         return await self.post(get_api_url(f'/channels/{channel_id}/messages/bulk-delete'), json={'messages': messages})
@@ -275,7 +471,9 @@ class Rest:
         )
     
     async def get_channel_invites(self, channel_id: int) -> RequestResponse:
-        return await self.get(get_api_url(f'/channels/{channel_id}/invites'))
+        return await self.cache.get(
+            ('invites', str(channel_id)), partial(self.get, get_api_url(f'/channels/{channel_id}/invites'))
+        )
     
     async def create_channel_invite(
         self,
@@ -295,7 +493,9 @@ class Rest:
         if target_user_type is not None:
             payload['target_user_type'] = target_user_type
         
-        return await self.post(get_api_url(f'/channels/{channel_id}/invites'), json=payload)
+        data = await self.post(get_api_url(f'/channels/{channel_id}/invites'), json=payload)
+        self.cache.invalidate(('invites', str(channel_id)))
+        return data
     
     async def delete_channel_permission(self, channel_id: int, overwrite_id: int):
         return await self.delete(get_api_url(f'/channels/{channel_id}/permissions/{overwrite_id}'))
@@ -304,16 +504,24 @@ class Rest:
         return await self.post(get_api_url(f'/channels/{channel_id}/typing'))
     
     async def get_pins(self, channel_id: int):
-        return await self.get(get_api_url(f'/channels/{channel_id}/pins'))
+        return await self.cache.get(
+            ('pins', str(channel_id)), partial(self.get, get_api_url(f'/channels/{channel_id}/pins'))
+        )
     
     async def add_pin(self, channel_id: int, message_id: int):
-        return await self.put(get_api_url(f'/channels/{channel_id}/pins/{message_id}'))
+        data = await self.put(get_api_url(f'/channels/{channel_id}/pins/{message_id}'))
+        self.cache.invalidate(('pins', str(channel_id)))
+        return data
 
     async def delete_pin(self, channel_id: int, message_id: int):
-        return await self.delete(get_api_url(f'/channels/{channel_id}/pins/{message_id}'))
+        data = await self.delete(get_api_url(f'/channels/{channel_id}/pins/{message_id}'))
+        self.cache.invalidate(('pins', str(channel_id)))
+        return data
     
     async def get_emojis(self, guild_id: int) -> RequestResponse:
-        return await self.get(get_api_url(f'/guilds/{guild_id}/emojis'))
+        return await self.cache.get(
+            ('emojis', str(guild_id)), partial(self.get, get_api_url(f'/guilds/{guild_id}/emojis'))
+        )
 
     async def get_emoji(self, guild_id: int, emoji_id: int) -> RequestResponse:
         return await self.get(get_api_url(f'/guilds/{guild_id}/emojis/{emoji_id}')) 
@@ -335,10 +543,14 @@ class Rest:
         if roles is not None:
             payload['roles'] = roles
 
-        return await self.patch(get_api_url(f'/guilds/{guild_id}/emojis/{emoji_id}'), json=payload)
+        data = await self.patch(get_api_url(f'/guilds/{guild_id}/emojis/{emoji_id}'), json=payload)
+        self.cache.invalidate(('emojis', str(guild_id)))
+        return data
     
     async def delete_emoji(self, guild_id: int, emoji_id: int) -> RequestResponse:
-        return await self.delete(get_api_url(f'/guilds/{guild_id}/emojis/{emoji_id}'))
+        data = await self.delete(get_api_url(f'/guilds/{guild_id}/emojis/{emoji_id}'))
+        self.cache.invalidate(('emojis', str(guild_id)))
+        return data
     
     async def create_guild(
         self,
@@ -390,7 +602,7 @@ class Rest:
         return await self.post(get_api_url('/guilds'), json=payload)
     
     async def get_guild(self, guild_id: int) -> RequestResponse:
-        return await self.get(get_api_url(f'/guilds/{guild_id}'))
+        return await self.cache.get(('guild', str(guild_id)), partial(self.get, get_api_url(f'/guilds/{guild_id}')))
     
     async def get_guild_preview(self, guild_id: int):
         return await self.get(get_api_url(f'guilds/{guild_id}/preview'))
@@ -474,7 +686,9 @@ class Rest:
         return await self.patch(get_api_url('/guilds'), json=payload)
 
     async def delete_guild(self, guild_id: int) -> RequestResponse:
-        return await self.delete(get_api_url(f'/guilds/{guild_id}'))
+        data = await self.delete(get_api_url(f'/guilds/{guild_id}'))
+        self.cache.invalidate(('guild', str(guild_id)), ('emojis', str(guild_id)))
+        return data
 
     async def create_guild_channel(
         self,
@@ -0,0 +1,93 @@
+import asyncio
+from time import monotonic
+from typing import Dict, Iterable, Optional
+
+from .client import Client
+from .gateway import GatewayWebSocket
+
+IDENTIFY_INTERVAL = 5
+
+class AutoShardedClient(Client):
+    def __init__(self, *, shard_count: Optional[int] = None, shard_ids: Optional[Iterable[int]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.shard_count = shard_count
+        self.shard_ids = list(shard_ids) if shard_ids is not None else None
+        self.shards: Dict[int, GatewayWebSocket] = {}
+        self.max_concurrency = 1
+        self.cluster = None
+        self._ready_shards = set()
+        self._identify_locks: Dict[int, asyncio.Lock] = {}
+        self._last_identify: Dict[int, float] = {}
+
+        if self.shard_ids is not None and self.shard_count is None:
+            raise ValueError('shard_count must be passed along with shard_ids.')
+
+    @property
+    def latency(self) -> float:
+        if not self.shards:
+            return float('inf')
+        return sum(ws.latency for ws in self.shards.values()) / len(self.shards)
+
+    @property
+    def latencies(self) -> Dict[int, float]:
+        return {shard_id: ws.latency for shard_id, ws in self.shards.items()}
+
+    def _get_websocket(self, guild_id) -> GatewayWebSocket:
+        return self.shards[self.get_shard_id(guild_id)]
+
+    async def connect(self):
+        if not self.logged_in:
+            raise Exception("Cannot connect to websocket without logging in.")
+        self._connect_started = monotonic()
+
+        data = await self.rest.get_gateway_bot()
+        self.max_concurrency = data['session_start_limit']['max_concurrency']
+
+        if self.shard_count is None:
+            self.shard_count = data['shards']
+
+        if self.shard_ids is None:
+            self.shard_ids = list(range(self.shard_count))
+
+        for shard_id in self.shard_ids:
+            self.shards[shard_id] = GatewayWebSocket(
+                self,
+                shard_id=shard_id,
+                shard_count=self.shard_count,
+                compress=self.ws.compress,
+                encoding=self.ws.encoding
+            )
+
+        self.ws = self.shards[self.shard_ids[0]]
+
+        try:
+            await asyncio.gather(*(self._run_gateway(ws, data['url']) for ws in self.shards.values()))
+        except KeyboardInterrupt:
+            pass
+
+    async def _before_identify(self, shard_id: Optional[int]) -> None:
+        if self.cluster is not None:
+            return await self.cluster.identify(shard_id)
+
+        # Shards whose id falls in the same max_concurrency bucket may only identify once every 5 seconds.
+        bucket = shard_id % self.max_concurrency
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+
+        async with lock:
+            delay = self._last_identify.get(bucket, -IDENTIFY_INTERVAL) + IDENTIFY_INTERVAL - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_identify[bucket] = monotonic()
+
+    async def close(self) -> None:
+        self.closed = True
+        self.outbox.close()
+        await asyncio.gather(*(ws.close() for ws in self.shards.values() if ws.socket is not None))
+        await self.rest.close()
+
+    async def _shard_streamed(self, shard_id: Optional[int]) -> None:
+        self._ready_shards.add(shard_id)
+        await self.dispatch_event('shard_ready', shard_id)
+
+        if len(self._ready_shards) == len(self.shards):
+            await self.dispatch_event('ready')
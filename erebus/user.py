@@ -0,0 +1,20 @@
+class User:
+    __slots__ = ('id', 'username', 'discriminator', 'avatar', 'bot', 'system', 'public_flags')
+
+    def __new__(cls):
+        raise Exception('Users should not be created manually.')
+
+    @classmethod
+    def _create_user(cls, data: dict):
+        user = object.__new__(cls)
+        user.id = data.get('id')
+        user._update(data)
+        return user
+
+    def _update(self, data: dict) -> None:
+        self.username = data.get('username')
+        self.discriminator = data.get('discriminator')
+        self.avatar = data.get('avatar')
+        self.bot = data.get('bot', False)
+        self.system = data.get('system', False)
+        self.public_flags = data.get('public_flags')
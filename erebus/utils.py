@@ -1,9 +1,93 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from random import uniform
+from typing import Any, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
+
+T = TypeVar('T')
 
 DISCORD_EPOCH = 1420070400000
 
-def slowflake_to_datetime(id: int):
-    return datetime.utcfromtimestamp(((id >> 22) + DISCORD_EPOCH) / 1000)
+Snowflake = Union[int, str]
+
+def snowflake_time(id: Snowflake) -> int:
+    return (int(id) >> 22) + DISCORD_EPOCH
+
+def snowflake_worker(id: Snowflake) -> int:
+    return (int(id) & 0x3E0000) >> 17
+
+def snowflake_process(id: Snowflake) -> int:
+    return (int(id) & 0x1F000) >> 12
+
+def snowflake_increment(id: Snowflake) -> int:
+    return int(id) & 0xFFF
+
+def snowflake_to_datetime(id: Snowflake) -> datetime:
+    return datetime.fromtimestamp(((int(id) >> 22) + DISCORD_EPOCH) / 1000, timezone.utc)
+
+slowflake_to_datetime = snowflake_to_datetime
+
+def datetime_to_snowflake(date_time: datetime, *, high: bool = False) -> int:
+    # Naive datetimes are treated as UTC, like the ones utcnow() returns.
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=timezone.utc)
+
+    milliseconds = int(date_time.timestamp() * 1000) - DISCORD_EPOCH
+    return (milliseconds << 22) + ((1 << 22) - 1 if high else 0)
+
+def snowflake_bounds(
+    *,
+    after: Optional[datetime] = None,
+    before: Optional[datetime] = None
+) -> Tuple[Optional[int], Optional[int]]:
+    # Ids strictly after `after` start above its last possible id, ids before `before` end below its first one.
+    return (
+        datetime_to_snowflake(after, high=True) if after is not None else None,
+        datetime_to_snowflake(before) if before is not None else None
+    )
+
+def snowflakes_to_timestamps(ids: Iterable[Snowflake]) -> List[int]:
+    return [(int(id) >> 22) + DISCORD_EPOCH for id in ids]
+
+def snowflakes_to_datetimes(ids: Iterable[Snowflake]) -> List[datetime]:
+    utc = timezone.utc
+    fromtimestamp = datetime.fromtimestamp
+    return [fromtimestamp(((int(id) >> 22) + DISCORD_EPOCH) / 1000, utc) for id in ids]
+
+def parse_time(timestamp: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(timestamp) if timestamp is not None else None
+
+class ExponentialBackoff:
+    def __init__(self, base: float = 1, maximum: float = 60) -> None:
+        self.base = base
+        self.maximum = maximum
+        self.attempts = 0
+
+    def delay(self) -> float:
+        # Full jitter, so shards that dropped together don't all reconnect together.
+        delay = uniform(0, min(self.maximum, self.base * 2 ** self.attempts))
+        self.attempts = min(self.attempts + 1, 16)
+        return delay
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+class CachedSlotProperty(Generic[T]):
+    def __init__(self, name: str, func: Callable[[Any], T]) -> None:
+        self.name = name
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance: Any, owner: type) -> T:
+        if instance is None:
+            return self
+
+        try:
+            return getattr(instance, self.name)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.name, value)
+            return value
 
-def datetime_to_snowflake(date_time: datetime):
-    unix_seconds = (date_time - datetime(1970, 1, 1)).total_seconds()
\ No newline at end of file
+def cached_slot_property(name: str) -> Callable[[Callable[[Any], T]], CachedSlotProperty[T]]:
+    def decorator(func: Callable[[Any], T]) -> CachedSlotProperty[T]:
+        return CachedSlotProperty(name, func)
+    return decorator
@@ -0,0 +1,97 @@
+import json
+import socket
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+class FakeGateway:
+    def __init__(
+        self,
+        *,
+        shards: int = 1,
+        max_concurrency: int = 1,
+        gateway_failures: int = 0,
+        heartbeat_interval: int = 45000,
+        ack_heartbeats: bool = True
+    ) -> None:
+        self.shards = shards
+        self.max_concurrency = max_concurrency
+        self.gateway_failures = gateway_failures
+        self.heartbeat_interval = heartbeat_interval
+        self.ack_heartbeats = ack_heartbeats
+        self.identifies: List[Tuple[float, Optional[List[int]]]] = []
+        self.resumes = 0
+        self.close_codes: List[Optional[int]] = []
+        self.sockets: List[web.WebSocketResponse] = []
+        self.started_at = monotonic()
+        self.port = None
+        self._runner = None
+
+    @property
+    def api_url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/api/v8'
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/ws', self._gateway)
+        app.router.add_route('*', '/api/v8/{path:.*}', self._rest)
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        self.port = sock.getsockname()[1]
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+
+    async def stop(self) -> None:
+        for ws in self.sockets:
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def _rest(self, request: web.Request) -> web.Response:
+        path = request.match_info['path']
+        if path == 'gateway/bot':
+            return web.json_response({
+                'url': f'ws://127.0.0.1:{self.port}/ws',
+                'shards': self.shards,
+                'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0,
+                                        'max_concurrency': self.max_concurrency}
+            })
+        if path == 'gateway':
+            if self.gateway_failures:
+                self.gateway_failures -= 1
+                return web.json_response({'message': 'Service Unavailable', 'code': 0}, status=503)
+            return web.json_response({'url': f'ws://127.0.0.1:{self.port}/ws'})
+        return web.json_response({'id': '1', 'username': 'bot'})
+
+    async def _send(self, ws: web.WebSocketResponse, payload: Dict[str, Any]) -> None:
+        await ws.send_str(json.dumps(payload))
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        await self._send(ws, {'op': 10, 'd': {'heartbeat_interval': self.heartbeat_interval}})
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+
+            data = json.loads(message.data)
+            if data['op'] == 1:
+                if self.ack_heartbeats:
+                    await self._send(ws, {'op': 11})
+            elif data['op'] == 2:
+                shard = data['d'].get('shard')
+                self.identifies.append((monotonic() - self.started_at, shard))
+                await self._send(ws, {'op': 0, 's': 1, 't': 'READY', 'd': {
+                    'session_id': 'session', 'guilds': [], 'user': {'id': '1', 'username': 'bot'}, 'shard': shard
+                }})
+            elif data['op'] == 6:
+                self.resumes += 1
+                await self._send(ws, {'op': 0, 's': 2, 't': 'RESUMED', 'd': {}})
+
+        self.close_codes.append(ws.close_code)
+        return ws
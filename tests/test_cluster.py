@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from multiprocessing import Pipe
+from time import monotonic
+
+import erebus
+import erebus.cluster
+import erebus.rest
+import erebus.shard
+from erebus.cluster import Cluster, ClusterConnection
+
+from fake_gateway import FakeGateway
+
+class FakeClient:
+    def __init__(self, loop, guilds, shards):
+        self.loop = loop
+        self.guilds = dict.fromkeys(range(guilds))
+        self.shards = dict.fromkeys(shards)
+
+def test_identify_is_paced_per_bucket(monkeypatch):
+    monkeypatch.setattr(erebus.cluster, 'IDENTIFY_INTERVAL', 5)
+    cluster = Cluster(token='token', workers=2, shard_count=4)
+    cluster.max_concurrency = 2
+    conn, _ = Pipe()
+    cluster._connections[conn] = None
+
+    start = monotonic()
+    for shard_id in range(4):
+        cluster._handle(conn, 'identify', shard_id, shard_id)
+
+    delays = sorted(round(due - start) for due, _, _ in cluster._identify_queue)
+    assert delays == [0, 0, 5, 5]
+
+def test_query_is_answered_by_every_worker():
+    cluster = Cluster(token='token', workers=2, shard_count=4)
+    loop = asyncio.new_event_loop()
+    connections = []
+
+    for worker, guilds in enumerate((3, 4)):
+        parent_conn, child_conn = Pipe()
+        cluster._connections[parent_conn] = None
+        connection = ClusterConnection(FakeClient(loop, guilds, [worker, worker + 2]), child_conn)
+        connection.start()
+        connections.append(connection)
+
+    stop = threading.Event()
+
+    def poll():
+        while not stop.is_set():
+            cluster._identify_queue.append((monotonic() + 0.05, None, -1))
+            cluster.poll()
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+
+    try:
+        guild_count = loop.run_until_complete(asyncio.wait_for(connections[0].guild_count(), 5))
+        shard_ids = loop.run_until_complete(asyncio.wait_for(connections[1].query('shard_ids'), 5))
+    finally:
+        stop.set()
+        thread.join()
+        for connection in connections:
+            connection.stop()
+        loop.close()
+
+    assert guild_count == 7
+    assert sorted(shard_ids) == [[0, 2], [1, 3]]
+
+def test_sharded_client_identifies_against_fake_gateway(monkeypatch):
+    monkeypatch.setattr(erebus.shard, 'IDENTIFY_INTERVAL', 0.5)
+
+    async def run():
+        gateway = FakeGateway(shards=4, max_concurrency=2)
+        await gateway.start()
+        monkeypatch.setattr(erebus.rest, 'API_BASE_URL', gateway.api_url)
+
+        client = erebus.AutoShardedClient(token='token', guild_ready_timeout=0.1)
+        ready = asyncio.Event()
+        client.on_ready = ready.set
+
+        await client.login()
+        task = asyncio.ensure_future(client.connect())
+        try:
+            await asyncio.wait_for(ready.wait(), 10)
+        finally:
+            await client.close()
+            await asyncio.wait_for(task, 5)
+            await gateway.stop()
+
+        return gateway, client
+
+    gateway, client = asyncio.run(run())
+
+    assert sorted(shard for _, shard in gateway.identifies) == [[0, 4], [1, 4], [2, 4], [3, 4]]
+    # Two identify buckets, so the first pair goes out together and the second pair waits out the interval.
+    times = sorted(time for time, _ in gateway.identifies)
+    assert times[2] - times[1] >= 0.4
+    assert client._ready_shards == {0, 1, 2, 3}
+    assert all(metrics['connect_time'] is not None for metrics in client.startup_metrics.values())
@@ -0,0 +1,43 @@
+import struct
+import zlib
+
+import pytest
+
+from erebus import etf
+
+def test_round_trip():
+    payload = {
+        'op': 0,
+        'd': {
+            'id': 2 ** 62,
+            'negative': -(2 ** 40),
+            'count': 300,
+            'small': 7,
+            'ratio': 0.5,
+            'name': 'erebus ✓',
+            'flags': [True, False, None],
+            'empty': [],
+            'nested': {'seq': -12},
+        },
+    }
+    assert etf.decode(etf.encode(payload)) == payload
+
+def test_string_ext_decodes_to_list_of_ints():
+    data = bytes((etf.FORMAT_VERSION, etf.STRING_EXT)) + struct.pack('>H', 2) + bytes((0, 4))
+    assert etf.decode(data) == [0, 4]
+
+def test_compressed_term():
+    term = etf.encode({'t': 'READY', 's': 1})[1:]
+    data = bytes((etf.FORMAT_VERSION, etf.COMPRESSED)) + struct.pack('>I', len(term)) + zlib.compress(term)
+    assert etf.decode(data) == {'t': 'READY', 's': 1}
+
+def test_bigints_as_str():
+    data = etf.encode({'id': 175928847299117063})
+    assert etf.decode(data) == {'id': 175928847299117063}
+    assert etf.decode(data, bigints_as_str=True) == {'id': '175928847299117063'}
+
+@pytest.mark.parametrize('cut', [1, 3, 8])
+def test_truncated_payload_raises(cut):
+    data = etf.encode({'id': 175928847299117063, 'name': 'erebus'})
+    with pytest.raises(etf.ETFDecodeError):
+        etf.decode(data[:-cut])
@@ -0,0 +1,50 @@
+import asyncio
+
+import erebus
+import erebus.rest
+
+from fake_gateway import FakeGateway
+
+async def poll(done) -> None:
+    while not done():
+        await asyncio.sleep(0.05)
+
+def run_until(monkeypatch, gateway: FakeGateway, done, **options):
+    async def run():
+        await gateway.start()
+        monkeypatch.setattr(erebus.rest, 'API_BASE_URL', gateway.api_url)
+
+        client = erebus.Client(token='token', guild_ready_timeout=0.1, **options)
+        # No request-level retries, so failures reach the reconnect loop straight away.
+        client.rest.max_retries = 1
+        ready = asyncio.Event()
+        client.on_ready = ready.set
+
+        await client.login()
+        task = asyncio.ensure_future(client.connect())
+        try:
+            await asyncio.wait_for(ready.wait(), 10)
+            await asyncio.wait_for(poll(done), 10)
+        finally:
+            await client.close()
+            await asyncio.wait_for(task, 5)
+            await gateway.stop()
+
+        return client
+
+    return asyncio.run(run())
+
+def test_gateway_outage_is_retried(monkeypatch):
+    gateway = FakeGateway(gateway_failures=2)
+    client = run_until(monkeypatch, gateway, lambda: True)
+
+    assert gateway.gateway_failures == 0
+    assert len(gateway.identifies) == 1
+    assert client.user is not None
+
+def test_zombie_connection_is_closed_and_resumed(monkeypatch):
+    gateway = FakeGateway(heartbeat_interval=100, ack_heartbeats=False)
+    run_until(monkeypatch, gateway, lambda: gateway.resumes)
+
+    assert gateway.close_codes[0] == 4000
+    assert len(gateway.identifies) == 1
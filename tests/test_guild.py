@@ -0,0 +1,16 @@
+import asyncio
+
+from erebus.guild import ChunkRequest
+
+def test_chunk_request_matches_int_ids():
+    loop = asyncio.new_event_loop()
+    try:
+        request = ChunkRequest([123, 456], loop.create_future())
+        request.add({'guild_id': '123', 'chunk_count': 1}, [])
+        assert not request.future.done()
+
+        request.add({'guild_id': '456', 'chunk_count': 2}, [])
+        request.add({'guild_id': '456', 'chunk_count': 2}, [])
+        assert request.future.done()
+    finally:
+        loop.close()